@@ -331,8 +331,10 @@ def write_gn_ninja(path, root_gen_dir, options):
         'tools/gn/input_file_manager.cc',
         'tools/gn/item.cc',
         'tools/gn/json_project_writer.cc',
+        'tools/gn/json_stream_writer.cc',
         'tools/gn/label.cc',
         'tools/gn/label_pattern.cc',
+        'tools/gn/label_pattern_set.cc',
         'tools/gn/lib_file.cc',
         'tools/gn/loader.cc',
         'tools/gn/location.cc',
@@ -435,6 +437,8 @@ def write_gn_ninja(path, root_gen_dir, options):
             'tools/gn/header_checker_unittest.cc',
             'tools/gn/inherited_libraries_unittest.cc',
             'tools/gn/input_conversion_unittest.cc',
+            'tools/gn/json_stream_writer_unittest.cc',
+            'tools/gn/label_pattern_set_unittest.cc',
             'tools/gn/label_pattern_unittest.cc',
             'tools/gn/label_unittest.cc',
             'tools/gn/loader_unittest.cc',
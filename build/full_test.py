@@ -3,6 +3,7 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
+import multiprocessing
 import os
 import shutil
 import subprocess
@@ -40,7 +41,10 @@ def main():
     RemoveDir('out')
 
   subprocess.check_call([sys.executable, os.path.join('build', 'build.py')])
-  subprocess.check_call([os.path.join('out', 'gn_unittests')])
+  subprocess.check_call([os.path.join('out', 'gn_unittests'),
+                         '--jobs=%d' % multiprocessing.cpu_count(),
+                         '--test_timings_json=' +
+                             os.path.join('out', 'gn_unittests_timings.json')])
   orig_dir = os.getcwd()
 
   in_chrome_tree_gn = sys.argv[2]
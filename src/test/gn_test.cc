@@ -17,9 +17,25 @@
 #include <stdlib.h>
 #include <string.h>
 
+#include <algorithm>
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
 #include "base/command_line.h"
+#include "base/files/file_path.h"
+#include "base/files/file_util.h"
+#include "base/files/scoped_temp_dir.h"
+#include "base/json/json_reader.h"
+#include "base/json/json_writer.h"
+#include "base/strings/string_number_conversions.h"
+#include "base/timer/elapsed_timer.h"
+#include "base/values.h"
 #include "build_config.h"
 #include "test.h"
+#include "tools/gn/exec_process.h"
+#include "worker_pool.h"
 
 #if defined(OS_WIN)
 #include <windows.h>
@@ -96,45 +112,112 @@ struct ScopedEnableVTEscapeProcessing {
 };
 #endif
 
-}  // namespace
+const char kTestFilterSwitch[] = "--gtest_filter=";
+const char kShardIndexSwitch[] = "--gtest_shard_index=";
+const char kTotalShardsSwitch[] = "--gtest_total_shards=";
+const char kJobsSwitch[] = "--jobs";
+const char kTimingsSwitch[] = "--test_timings_json=";
 
-bool testing::Test::Check(bool condition,
-                          const char* file,
-                          int line,
-                          const char* error) {
-  if (!condition) {
-    printf("\n*** Failure in %s:%d\n%s\n", file, line, error);
-    failed_ = true;
-  }
-  return condition;
-}
+struct Options {
+  const char* test_filter = "*";
 
-int main(int argc, char** argv) {
-  base::CommandLine::Init(argc, argv);
+  // Only the tests matching the filter whose index modulo |total_shards| is
+  // |shard_index| are run. This is the same scheme gtest uses, so test
+  // launchers that shard gtest binaries work with this one too.
+  int shard_index = 0;
+  int total_shards = 1;
 
-#if defined(OS_WIN)
-  ScopedEnableVTEscapeProcessing enable_vt_processing;
-#endif
-  setvbuf(stdout, NULL, _IOLBF, BUFSIZ);
+  // When greater than one, the selected tests are split among this many
+  // child processes that run concurrently.
+  int jobs = 1;
 
-  int tests_started = 0;
+  // Per-test results and times are written here as JSON when not empty.
+  std::string timings_path;
+};
+
+// Returns the value of |arg| if it begins with |prefix|, null otherwise.
+const char* GetSwitchValue(const char* arg, const char* prefix) {
+  size_t prefix_len = strlen(prefix);
+  if (strncmp(arg, prefix, prefix_len) != 0)
+    return nullptr;
+  return &arg[prefix_len];
+}
+
+bool ParseInt(const char* value, const char* name, int min, int* out) {
+  if (!base::StringToInt(value, out) || *out < min) {
+    fprintf(stderr, "Invalid value for %s: \"%s\"\n", name, value);
+    return false;
+  }
+  return true;
+}
+
+bool ParseOptions(int argc, char** argv, Options* options) {
+  // The sharding environment variables gtest supports are used unless
+  // overridden on the command line.
+  if (const char* index = getenv("GTEST_SHARD_INDEX")) {
+    if (!ParseInt(index, "GTEST_SHARD_INDEX", 0, &options->shard_index))
+      return false;
+  }
+  if (const char* total = getenv("GTEST_TOTAL_SHARDS")) {
+    if (!ParseInt(total, "GTEST_TOTAL_SHARDS", 1, &options->total_shards))
+      return false;
+  }
 
-  const char* test_filter = "*";
   for (int i = 1; i < argc; ++i) {
-    const char kTestFilterPrefix[] = "--gtest_filter=";
-    if (strncmp(argv[i], kTestFilterPrefix, strlen(kTestFilterPrefix)) == 0) {
-      test_filter = &argv[i][strlen(kTestFilterPrefix)];
+    const char* value;
+    if ((value = GetSwitchValue(argv[i], kTestFilterSwitch))) {
+      options->test_filter = value;
+    } else if ((value = GetSwitchValue(argv[i], kShardIndexSwitch))) {
+      if (!ParseInt(value, "--gtest_shard_index", 0, &options->shard_index))
+        return false;
+    } else if ((value = GetSwitchValue(argv[i], kTotalShardsSwitch))) {
+      if (!ParseInt(value, "--gtest_total_shards", 1, &options->total_shards))
+        return false;
+    } else if ((value = GetSwitchValue(argv[i], kTimingsSwitch))) {
+      options->timings_path = value;
+    } else if ((value = GetSwitchValue(argv[i], kJobsSwitch)) &&
+               (*value == '=' || *value == '\0')) {
+      // Accept both "--jobs=N" and "--jobs N".
+      if (*value == '=') {
+        ++value;
+      } else if (i + 1 < argc) {
+        value = argv[++i];
+      }
+      if (!ParseInt(value, "--jobs", 1, &options->jobs))
+        return false;
     }
   }
 
-  int nactivetests = 0;
-  for (int i = 0; i < ntests; i++)
-    if ((tests[i].should_run = TestMatchesFilter(tests[i].name, test_filter)))
-      ++nactivetests;
+  if (options->shard_index >= options->total_shards) {
+    fprintf(stderr, "Shard index %d is out of range for %d shards\n",
+            options->shard_index, options->total_shards);
+    return false;
+  }
+  return true;
+}
+
+bool WriteTimings(const std::string& path,
+                  std::unique_ptr<base::DictionaryValue> test_results) {
+  base::DictionaryValue root;
+  root.SetWithoutPathExpansion("tests", std::move(test_results));
+  std::string json;
+  base::JSONWriter::WriteWithOptions(
+      root, base::JSONWriter::OPTIONS_PRETTY_PRINT, &json);
+  if (base::WriteFile(base::FilePath::FromUTF8Unsafe(path), json.data(),
+                      static_cast<int>(json.size())) !=
+      static_cast<int>(json.size())) {
+    fprintf(stderr, "Unable to write %s\n", path.c_str());
+    return false;
+  }
+  return true;
+}
 
+// Runs the selected tests in this process. Returns true if they all passed.
+bool RunTests(int nactivetests, const Options& options) {
   const char* prefix = "";
   const char* suffix = "\n";
 #if defined(OS_WIN)
+  ScopedEnableVTEscapeProcessing enable_vt_processing;
   if (enable_vt_processing.is_valid())
 #else
   if (isatty(1))
@@ -143,24 +226,174 @@ int main(int argc, char** argv) {
     prefix = "\r";
     suffix = "\x1B[K";
   }
+
+  auto test_results = std::make_unique<base::DictionaryValue>();
+  int tests_started = 0;
   bool passed = true;
   for (int i = 0; i < ntests; i++) {
     if (!tests[i].should_run)
       continue;
 
     ++tests_started;
+    base::ElapsedTimer timer;
     testing::Test* test = tests[i].factory();
     printf("%s[%d/%d] %s%s", prefix, tests_started, nactivetests, tests[i].name,
            suffix);
     test->SetUp();
     test->Run();
     test->TearDown();
-    if (test->Failed())
+    bool test_passed = !test->Failed();
+    if (!test_passed)
       passed = false;
     delete test;
+
+    auto result = std::make_unique<base::DictionaryValue>();
+    result->SetKey(
+        "elapsed_us",
+        base::Value(static_cast<int>(timer.Elapsed().InMicroseconds())));
+    result->SetKey("passed", base::Value(test_passed));
+    test_results->SetWithoutPathExpansion(tests[i].name, std::move(result));
+  }
+
+  printf("\n%s\n", passed ? "PASSED" : "FAILED");
+  fflush(stdout);
+
+  if (!options.timings_path.empty() &&
+      !WriteTimings(options.timings_path, std::move(test_results)))
+    passed = false;
+  return passed;
+}
+
+struct ShardResult {
+  base::CommandLine cmdline{base::CommandLine::NO_PROGRAM};
+  base::FilePath timings_path;
+
+  bool launched = false;
+  int exit_code = 0;
+  std::string output;
+};
+
+void RunShard(const base::FilePath& startup_dir, ShardResult* shard) {
+  std::string std_err;
+  shard->launched = internal::ExecProcess(
+      shard->cmdline, startup_dir, &shard->output, &std_err, &shard->exit_code);
+  shard->output += std_err;
+}
+
+// Splits the selected tests among |options.jobs| copies of this binary running
+// concurrently and merges their results. Returns true if they all passed.
+bool RunTestsInParallel(int nactivetests, const Options& options) {
+  base::ScopedTempDir temp_dir;
+  base::FilePath startup_dir;
+  if (!temp_dir.CreateUniqueTempDir() ||
+      !base::GetCurrentDirectory(&startup_dir)) {
+    fprintf(stderr, "Unable to set up the child processes\n");
+    return false;
+  }
+
+  // Each child takes every |jobs|-th test of this process' shard by sharding
+  // it further: the union of child shards |shard_index + k * total_shards|
+  // of |total_shards * jobs| is exactly the shard of this process.
+  int jobs = std::min(options.jobs, std::max(nactivetests, 1));
+  int child_total_shards = options.total_shards * jobs;
+  std::vector<ShardResult> shards(jobs);
+  for (int i = 0; i < jobs; i++) {
+    ShardResult& shard = shards[i];
+    shard.timings_path = temp_dir.GetPath().AppendASCII(
+        "shard" + base::IntToString(i) + ".json");
+    shard.cmdline.SetProgram(
+        base::CommandLine::ForCurrentProcess()->GetProgram());
+    shard.cmdline.AppendArg(std::string(kTestFilterSwitch) +
+                            options.test_filter);
+    shard.cmdline.AppendArg(
+        kShardIndexSwitch +
+        base::IntToString(options.shard_index + i * options.total_shards));
+    shard.cmdline.AppendArg(kTotalShardsSwitch +
+                            base::IntToString(child_total_shards));
+    shard.cmdline.AppendArg(kTimingsSwitch + shard.timings_path.AsUTF8Unsafe());
+  }
+
+  printf("Running %d tests in %d processes\n", nactivetests, jobs);
+  fflush(stdout);
+  {
+    WorkerPool pool(jobs);
+    for (ShardResult& shard : shards)
+      pool.PostTask(base::BindOnce(&RunShard, startup_dir, &shard));
+    // The pool's destructor waits for all of the children.
+  }
+
+  auto test_results = std::make_unique<base::DictionaryValue>();
+  bool passed = true;
+  for (int i = 0; i < jobs; i++) {
+    const ShardResult& shard = shards[i];
+    bool shard_passed = shard.launched && shard.exit_code == 0;
+
+    std::string json;
+    std::unique_ptr<base::Value> timings;
+    if (base::ReadFileToString(shard.timings_path, &json))
+      timings = base::JSONReader::Read(json);
+    base::DictionaryValue* shard_results = nullptr;
+    base::DictionaryValue* timings_dict = nullptr;
+    if (timings && timings->GetAsDictionary(&timings_dict) &&
+        timings_dict->GetDictionaryWithoutPathExpansion("tests",
+                                                        &shard_results)) {
+      test_results->MergeDictionary(shard_results);
+    } else {
+      // The child didn't finish, most likely because a test crashed.
+      shard_passed = false;
+    }
+
+    if (shard_passed) {
+      printf("[shard %d/%d] %d tests PASSED\n", i + 1, jobs,
+             shard_results ? static_cast<int>(shard_results->size()) : 0);
+    } else {
+      passed = false;
+      printf("[shard %d/%d] FAILED\n%s\n", i + 1, jobs, shard.output.c_str());
+    }
   }
 
   printf("\n%s\n", passed ? "PASSED" : "FAILED");
   fflush(stdout);
+
+  if (!options.timings_path.empty() &&
+      !WriteTimings(options.timings_path, std::move(test_results)))
+    passed = false;
+  return passed;
+}
+
+}  // namespace
+
+bool testing::Test::Check(bool condition,
+                          const char* file,
+                          int line,
+                          const char* error) {
+  if (!condition) {
+    printf("\n*** Failure in %s:%d\n%s\n", file, line, error);
+    failed_ = true;
+  }
+  return condition;
+}
+
+int main(int argc, char** argv) {
+  base::CommandLine::Init(argc, argv);
+
+  setvbuf(stdout, NULL, _IOLBF, BUFSIZ);
+
+  Options options;
+  if (!ParseOptions(argc, argv, &options))
+    return EXIT_FAILURE;
+
+  int nactivetests = 0;
+  int nmatching = 0;
+  for (int i = 0; i < ntests; i++) {
+    tests[i].should_run =
+        TestMatchesFilter(tests[i].name, options.test_filter) &&
+        nmatching++ % options.total_shards == options.shard_index;
+    if (tests[i].should_run)
+      ++nactivetests;
+  }
+
+  bool passed = options.jobs > 1 ? RunTestsInParallel(nactivetests, options)
+                                 : RunTests(nactivetests, options);
   return passed ? EXIT_SUCCESS : EXIT_FAILURE;
 }
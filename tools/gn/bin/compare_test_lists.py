@@ -2,27 +2,77 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
-# This script compares the gtest test list for two different builds.
+# This script compares the gtest test lists for two different builds.
 #
 # Usage:
-#   compare_test_lists.py <build_dir_1> <build_dir_2> <binary_name>
+#   compare_test_lists.py [options] <build_dir_1> <build_dir_2> <binary>...
 #
 # For example, from the "src" directory:
 #   python tools/gn/bin/compare_test_lists.py out/Debug out/gnbuild ipc_tests
 #
-# This will compile the given binary in both output directories, then extracts
-# the test lists and prints missing or extra tests between the first and the
-# second build.
-
+# This will compile the given binaries in both output directories, then
+# extract the test lists and print missing or extra tests between the first
+# and the second build.
+#
+# Binaries can be given as shell-style patterns (quote them so the shell
+# doesn't expand them) which are matched against the targets in the root of
+# each build directory:
+#   python tools/gn/bin/compare_test_lists.py out/Debug out/gnbuild \
+#       '*_unittests' '*_browsertests' --json-output=diff.json
+#
+# Binaries that only exist in one of the directories are reported rather than
+# built. Each build directory is built with a single ninja invocation and the
+# two builds run concurrently. Test lists are extracted in parallel.
+
+import fnmatch
+import json
+import multiprocessing
+import optparse
 import os
 import subprocess
 import sys
 
-def BuildBinary(build_dir, binary_name):
-  """Builds the given binary in the given directory with Ninja.
 
-  Returns True on success."""
-  return subprocess.call(["ninja", "-C", build_dir, binary_name]) == 0
+def IsPattern(name):
+  return any(c in name for c in '*?[')
+
+
+def GetRootTargets(build_dir):
+  """Returns the set of ninja targets in the root of the given directory."""
+  raw_output = subprocess.check_output(
+      ["ninja", "-C", build_dir, "-t", "targets", "all"])
+  targets = set()
+  for line in raw_output.split('\n'):
+    # Each line is "<target>: <rule>".
+    target = line.split(':', 1)[0].strip()
+    if target and '/' not in target:
+      targets.add(target)
+  return targets
+
+
+def ExpandBinaryNames(build_dir, names):
+  """Returns the set of the given binaries that exist in the build directory.
+
+  Names that are patterns are replaced by the matching targets."""
+  targets = GetRootTargets(build_dir)
+  result = set()
+  for name in names:
+    if IsPattern(name):
+      result.update(fnmatch.filter(targets, name))
+    elif name in targets:
+      result.add(name)
+  return result
+
+
+def BuildBinaries(build_dirs, binary_names):
+  """Builds the given binaries in each of the given directories with Ninja.
+
+  All directories are built concurrently with one ninja invocation each.
+  Returns the list of directories that failed to build."""
+  processes = [
+      (build_dir, subprocess.Popen(["ninja", "-C", build_dir] + binary_names))
+      for build_dir in build_dirs]
+  return [build_dir for build_dir, process in processes if process.wait() != 0]
 
 
 def GetTestList(path_to_binary):
@@ -56,46 +106,128 @@ def GetTestList(path_to_binary):
   return test_set
 
 
-def PrintSetDiff(a_name, a, b_name, b, binary_name):
-  """Prints the test list difference between the given sets a and b.
+def GetTestListOrError(path_to_binary):
+  """Runs GetTestList in a worker process.
+
+  Returns a (test_set, error) tuple where exactly one is None, since an
+  exception would abort the whole pool."""
+  try:
+    return GetTestList(path_to_binary), None
+  except (OSError, subprocess.CalledProcessError) as e:
+    return None, str(e)
+
+
+def GetSetDiff(a, b):
+  """Returns a dictionary describing the difference between sets a and b."""
+  a_not_b = sorted(a - b)
+  b_not_a = sorted(b - a)
+  return {
+    'match': not a_not_b and not b_not_a,
+    'only_in_a': a_not_b,
+    'only_in_b': b_not_a,
+  }
+
+
+def PrintSetDiff(a_name, b_name, diff, binary_name):
+  """Prints the test list difference returned by GetSetDiff.
 
   a_name and b_name will be used to refer to the directories of the two sets,
   and the binary name will be shown as the source of the output."""
 
-  a_not_b = list(a - b)
-  if len(a_not_b):
+  if diff['only_in_a']:
     print "\n", binary_name, "tests in", a_name, "but not", b_name
-    a_not_b.sort()
-    for cur in a_not_b:
+    for cur in diff['only_in_a']:
       print "  ", cur
 
-  b_not_a = list(b - a)
-  if len(b_not_a):
+  if diff['only_in_b']:
     print "\n", binary_name, "tests in", b_name, "but not", a_name
-    b_not_a.sort()
-    for cur in b_not_a:
+    for cur in diff['only_in_b']:
       print "  ", cur
 
-  if len(a_not_b) == 0 and len(b_not_a) == 0:
-    print "\nTests match!"
+  if diff['match']:
+    print "\n", binary_name, "tests match!"
 
 
-def Run(a_dir, b_dir, binary_name):
-  if not BuildBinary(a_dir, binary_name):
-    print "Building", binary_name, "in", a_dir, "failed"
+def Run(a_dir, b_dir, names, jobs, json_output):
+  a_binaries = ExpandBinaryNames(a_dir, names)
+  b_binaries = ExpandBinaryNames(b_dir, names)
+  if not a_binaries and not b_binaries:
+    print "No binaries match"
     return 1
-  if not BuildBinary(b_dir, binary_name):
-    print "Building", binary_name, "in", b_dir, "failed"
+  for name in names:
+    if not IsPattern(name) and name not in a_binaries | b_binaries:
+      print "Warning:", name, "is not a target in either directory"
+
+  report = {
+    'a_dir': a_dir,
+    'b_dir': b_dir,
+    'binaries': {},
+    'binaries_only_in_a': sorted(a_binaries - b_binaries),
+    'binaries_only_in_b': sorted(b_binaries - a_binaries),
+  }
+  for key, in_dir, not_in_dir in (('binaries_only_in_a', a_dir, b_dir),
+                                  ('binaries_only_in_b', b_dir, a_dir)):
+    if report[key]:
+      print "\nBinaries in", in_dir, "but not", not_in_dir
+      for binary_name in report[key]:
+        print "  ", binary_name
+
+  binary_names = sorted(a_binaries & b_binaries)
+  if binary_names:
+    failed_dirs = BuildBinaries([a_dir, b_dir], binary_names)
+    if failed_dirs:
+      for build_dir in failed_dirs:
+        print "Building in", build_dir, "failed"
+      return 1
+
+  paths = [os.path.join(build_dir, binary_name)
+           for binary_name in binary_names
+           for build_dir in (a_dir, b_dir)]
+  pool = multiprocessing.Pool(jobs)
+  try:
+    test_lists = pool.map(GetTestListOrError, paths)
+  finally:
+    pool.close()
+    pool.join()
+
+  all_match = (not report['binaries_only_in_a'] and
+               not report['binaries_only_in_b'])
+  for i, binary_name in enumerate(binary_names):
+    (a_tests, a_error), (b_tests, b_error) = test_lists[2 * i:2 * i + 2]
+    if a_error or b_error:
+      result = {'match': False, 'error': a_error or b_error}
+      print "\nListing", binary_name, "tests failed:", result['error']
+    else:
+      result = GetSetDiff(a_tests, b_tests)
+      PrintSetDiff(a_dir, b_dir, result, binary_name)
+    all_match = all_match and result['match']
+    report['binaries'][binary_name] = result
+  report['match'] = all_match
+
+  if json_output:
+    with open(json_output, 'w') as f:
+      json.dump(report, f, indent=2, separators=(',', ': '),
+                sort_keys=True)
+      f.write('\n')
+  return 0
+
+
+def main():
+  parser = optparse.OptionParser(
+      usage='%prog [options] <build_dir_1> <build_dir_2> <binary>...')
+  parser.add_option('-j', '--jobs', type='int',
+                    default=multiprocessing.cpu_count(),
+                    help='Number of binaries to list tests of at once.')
+  parser.add_option('--json-output',
+                    help='Write a machine-readable report of the '
+                         'differences to this file.')
+  options, args = parser.parse_args()
+  if len(args) < 3:
+    parser.print_usage()
     return 1
-
-  a_tests = GetTestList(os.path.join(a_dir, binary_name))
-  b_tests = GetTestList(os.path.join(b_dir, binary_name))
-
-  PrintSetDiff(a_dir, a_tests, b_dir, b_tests, binary_name)
+  return Run(args[0], args[1], args[2:], max(options.jobs, 1),
+             options.json_output)
 
 
-if len(sys.argv) != 4:
-  print "Usage: compare_test_lists.py <build_dir_1> <build_dir_2> " \
-      "<test_binary_name>"
-  sys.exit(1)
-sys.exit(Run(sys.argv[1], sys.argv[2], sys.argv[3]))
+if __name__ == '__main__':
+  sys.exit(main())
@@ -10,11 +10,18 @@
 #
 #   map <F1> :pyf <path-to-this-file>/gn-format.py<CR>
 #
-# gn format currently formats only a complete file so visual ranges, etc. won't
-# be used. It operates on the current, potentially unsaved buffer and does not
-# create or save any files. To revert a formatting, just undo.
+# In normal mode, this formats the whole file. With a visual selection of
+# several lines, only the top-level statements overlapping the selection are
+# formatted.
+#
+# It operates on the current, potentially unsaved buffer and does not create
+# or save any files. To revert a formatting, just undo.
+#
+# A single "gn format --server" process is started the first time and reused
+# afterwards. gn returns the line edits to make rather than the whole
+# formatted file, so only the changed lines of the buffer are touched.
 
-import difflib
+import json
 import subprocess
 import sys
 import vim
@@ -22,11 +29,15 @@ import vim
 # Change this to the full path if gn is not on the path.
 binary = 'gn'
 
-def main():
-  # Get the current text.
-  buf = vim.current.buffer
-  text = '\n'.join(buf)
+# The formatter process is kept across runs of this file, which vim executes
+# in the same namespace each time.
+try:
+  gn_format_server
+except NameError:
+  gn_format_server = None
 
+
+def StartServer():
   is_win = sys.platform.startswith('win32')
   # Avoid flashing an ugly cmd prompt on Windows when invoking gn.
   startupinfo = None
@@ -35,25 +46,48 @@ def main():
     startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
     startupinfo.wShowWindow = subprocess.SW_HIDE
 
-  # Call formatter. Needs shell=True on Windows due to gn.bat in depot_tools.
-  p = subprocess.Popen([binary, 'format', '--stdin'],
-                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                       stdin=subprocess.PIPE, startupinfo=startupinfo,
-                       shell=is_win, universal_newlines=True)
-  stdout, stderr = p.communicate(input=text)
-  if p.returncode != 0:
+  # Needs shell=True on Windows due to gn.bat in depot_tools.
+  return subprocess.Popen([binary, 'format', '--server'],
+                          stdout=subprocess.PIPE, stdin=subprocess.PIPE,
+                          startupinfo=startupinfo, shell=is_win,
+                          universal_newlines=True)
+
+
+def Format(request):
+  """Sends the request to the formatter and returns the response.
+
+  Returns None if the formatter process failed."""
+  global gn_format_server
+  if gn_format_server is None or gn_format_server.poll() is not None:
+    gn_format_server = StartServer()
+  try:
+    gn_format_server.stdin.write(json.dumps(request) + '\n')
+    gn_format_server.stdin.flush()
+    return json.loads(gn_format_server.stdout.readline())
+  except (IOError, ValueError):
+    # The process died or is an old gn without --server. Start over next time.
+    gn_format_server.kill()
+    gn_format_server = None
+    return None
+
+
+def main():
+  buf = vim.current.buffer
+  request = {'text': '\n'.join(buf)}
+  selection = vim.current.range
+  if selection.end > selection.start:
+    request['lines'] = '%d:%d' % (selection.start + 1, selection.end + 1)
+
+  response = Format(request)
+  if response is None:
     print 'Formatting failed, please report to gn-dev@chromium.org.'
-    print stdout, stderr
+  elif 'error' in response:
+    print 'Formatting failed:', response['error']
   else:
-    # Otherwise, replace current buffer.
-    lines = stdout.split('\n')
-    # Last line should have trailing \n, but we don't want to insert a blank
-    # line at the end of the buffer, so remove that.
-    if lines[-1] == '':
-      lines = lines[:-1]
-    sequence = difflib.SequenceMatcher(None, vim.current.buffer, lines)
-    for op in reversed(sequence.get_opcodes()):
-      if op[0] is not 'equal':
-        vim.current.buffer[op[1]:op[2]] = lines[op[3]:op[4]]
+    # The edits are ordered, apply them from the end so that the line numbers
+    # of the earlier ones stay valid.
+    for edit in reversed(response['edits']):
+      buf[edit['begin']:edit['end']] = [
+          line.encode('utf-8') for line in edit['lines']]
 
 main()
@@ -3,7 +3,7 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
-# Runs 'gn help' and various subhelps, and spits out html.
+# Runs 'gn help --format=json all' and spits out html.
 # TODO:
 # - Handle numbered and dashed lists -> <ol> <ul>. (See "os" and "toolchain").
 # - Handle "Arguments:" blocks a bit better (the argument names could be
@@ -12,65 +12,85 @@
 # - Spit out other similar formats like wiki, markdown, whatever.
 
 import cgi
+import json
 import subprocess
 import sys
 
 
-def GetOutput(*args):
-  try:
-    return subprocess.check_output([sys.argv[1]] + list(args))
-  except subprocess.CalledProcessError:
-    return ''
+def GetHelpSections(gn_binary):
+  """Returns the list of help sections from a single dump of all help.
 
+  Each section is a dictionary with its "anchor", "title" and "topics". Each
+  topic is a dictionary with its "name", "help_short" and "help" text."""
+  output = subprocess.check_output([gn_binary, 'help', '--format=json', 'all'])
+  return json.loads(output)['sections']
 
-def ParseTopLevel(out):
-  commands = []
-  output = []
-  for line in out.splitlines():
-    if line.startswith('  '):
-      command, sep, rest = line.partition(':')
-      command = command.strip()
-      is_option = command.startswith('-')
-      output_line = ['<li>']
-      if not is_option:
-        commands.append(command)
-        output_line.append('<a href="#' + cgi.escape(command) + '">')
-      output_line.append(cgi.escape(command))
-      if not is_option:
-        output_line.append('</a>')
-      output_line.extend([sep + cgi.escape(rest) + '</li>'])
-      output.append(''.join(output_line))
-    else:
-      output.append('<h2>' + cgi.escape(line) + '</h2>')
-  return commands, output
 
+def GetAnchors(sections):
+  """Returns a dictionary of (section anchor, topic name) to a unique anchor.
+
+  The same name can be used in different sections, like the "args" command
+  and the "args" variable."""
+  anchors = {}
+  used = set()
+  for section in sections:
+    for topic in section['topics']:
+      anchor = topic['name']
+      if anchor in used:
+        anchor = section['anchor'] + '_' + anchor
+      used.add(anchor)
+      anchors[(section['anchor'], topic['name'])] = anchor
+  return anchors
+
+
+def FormatTableOfContents(section, anchors):
+  output = ['<h2>' + cgi.escape(section['title']) + '</h2>', '<ul>']
+  for topic in section['topics']:
+    name = topic['name']
+    anchor = anchors[(section['anchor'], name)]
+    # The short help starts with the topic name, which becomes the link.
+    _, sep, rest = topic['help_short'].partition(':')
+    output.append('<li><a href="#' + cgi.escape(anchor, True) + '">' +
+                  cgi.escape(name) + '</a>' + sep + cgi.escape(rest) + '</li>')
+  output.append('</ul>')
+  return output
+
+
+def IsSubsection(lines, i):
+  """Returns whether lines[i] is a subsection heading like "Arguments".
+
+  Headings are unindented and are neither preceded nor followed by other
+  unindented text, unlike the continuation of a wrapped usage line."""
+  line = lines[i]
+  if not line.strip() or line.startswith(' '):
+    return False
+  if i > 0 and lines[i - 1].strip() and not lines[i - 1].startswith(' '):
+    return False
+  return (i + 1 == len(lines) or not lines[i + 1].strip() or
+          lines[i + 1].startswith(' '))
 
-def ParseCommand(command, out):
-  first_line = True
+
+def FormatTopic(anchor, help_text):
   got_example = False
   output = []
-  for line in out.splitlines():
-    if first_line:
-      name, sep, rest = line.partition(':')
-      name = name.strip()
-      output.append('<h3><a name="' + cgi.escape(command) + '">' +
-                    cgi.escape(name + sep + rest) + '</a></h3>')
-      first_line = False
+  lines = help_text.splitlines()
+  for i, line in enumerate(lines):
+    if i == 0:
+      output.append('<h3><a name="' + cgi.escape(anchor, True) + '">' +
+                    cgi.escape(line.strip()) + '</a></h3>')
+    elif line.startswith('Example'):
+      # Special subsection that's pre-formatted.
+      if got_example:
+        output.append('</pre>')
+      got_example = True
+      output.append('<h4>' + cgi.escape(line.strip()) + '</h4>')
+      output.append('<pre>')
+    elif not line.strip():
+      output.append('<p>')
+    elif IsSubsection(lines, i):
+      output.append('<h4>' + cgi.escape(line.rstrip(':')) + '</h4>')
     else:
-      if line.startswith('Example'):
-        # Special subsection that's pre-formatted.
-        if got_example:
-          output.append('</pre>')
-        got_example = True
-        output.append('<h4>Example</h4>')
-        output.append('<pre>')
-      elif not line.strip():
-        output.append('<p>')
-      elif not line.startswith('  ') and line.endswith(':'):
-        # Subsection.
-        output.append('<h4>' + cgi.escape(line[:-1]) + '</h4>')
-      else:
-        output.append(cgi.escape(line))
+      output.append(cgi.escape(line))
   if got_example:
     output.append('</pre>')
   return output
@@ -94,10 +114,17 @@ def main():
     <div id="container"><h1>GN</h1>
 '''
   footer = '</div></body></html>'
-  commands, output = ParseTopLevel(GetOutput('help'))
-  for command in commands:
-    output += ParseCommand(command, GetOutput('help', command))
-  print header + '\n'.join(output) + footer
+
+  sections = GetHelpSections(sys.argv[1])
+  anchors = GetAnchors(sections)
+  output = []
+  for section in sections:
+    output += FormatTableOfContents(section, anchors)
+  for section in sections:
+    for topic in section['topics']:
+      output += FormatTopic(anchors[(section['anchor'], topic['name'])],
+                            topic['help'])
+  print (header + '\n'.join(output) + footer).encode('utf-8')
   return 0
 
 
@@ -8,13 +8,14 @@
 #include <memory>
 #include <set>
 #include <sstream>
+#include <utility>
 
 #include "base/command_line.h"
-#include "base/json/json_writer.h"
 #include "base/strings/string_util.h"
 #include "tools/gn/commands.h"
 #include "tools/gn/config.h"
 #include "tools/gn/desc_builder.h"
+#include "tools/gn/json_stream_writer.h"
 #include "tools/gn/setup.h"
 #include "tools/gn/standard_out.h"
 #include "tools/gn/switches.h"
@@ -463,28 +464,45 @@ int RunDesc(const std::vector<std::string>& args) {
   }
 
   if (json) {
-    // Convert all targets/configs to JSON, serialize and print them
-    auto res = std::make_unique<base::DictionaryValue>();
-    if (!target_matches.empty()) {
-      for (const auto* target : target_matches) {
-        res->SetWithoutPathExpansion(
-            target->label().GetUserVisibleName(
-                target->settings()->default_toolchain_label()),
-            DescBuilder::DescriptionForTarget(
-                target, what_to_print, cmdline->HasSwitch(kAll),
-                cmdline->HasSwitch(kTree), cmdline->HasSwitch(kBlame)));
-      }
-    } else if (!config_matches.empty()) {
+    // Convert all targets/configs to JSON and print them one at a time so the
+    // whole output is never held in memory. The JSON dictionary is written in
+    // key order.
+    std::vector<std::pair<std::string, const Target*>> named_targets;
+    for (const auto* target : target_matches) {
+      named_targets.emplace_back(
+          target->label().GetUserVisibleName(
+              target->settings()->default_toolchain_label()),
+          target);
+    }
+    std::sort(named_targets.begin(), named_targets.end());
+
+    std::vector<std::pair<std::string, const Config*>> named_configs;
+    if (target_matches.empty()) {
       for (const auto* config : config_matches) {
-        res->SetWithoutPathExpansion(
-            config->label().GetUserVisibleName(false),
-            DescBuilder::DescriptionForConfig(config, what_to_print));
+        named_configs.emplace_back(config->label().GetUserVisibleName(false),
+                                   config);
       }
+      std::sort(named_configs.begin(), named_configs.end());
+    }
+
+    std::ostringstream out;
+    JSONDictionaryStreamWriter res(out, 0);
+    for (const auto& pair : named_targets) {
+      res.Write(pair.first,
+                *DescBuilder::DescriptionForTarget(
+                    pair.second, what_to_print, cmdline->HasSwitch(kAll),
+                    cmdline->HasSwitch(kTree), cmdline->HasSwitch(kBlame)));
+      OutputString(out.str());
+      out.str(std::string());
+    }
+    for (const auto& pair : named_configs) {
+      res.Write(pair.first,
+                *DescBuilder::DescriptionForConfig(pair.second, what_to_print));
+      OutputString(out.str());
+      out.str(std::string());
     }
-    std::string s;
-    base::JSONWriter::WriteWithOptions(
-        *res.get(), base::JSONWriter::OPTIONS_PRETTY_PRINT, &s);
-    OutputString(s);
+    res.Close();
+    OutputString(out.str());
   } else {
     // Regular (non-json) formatted output
     bool multiple_outputs = (target_matches.size() + config_matches.size()) > 1;
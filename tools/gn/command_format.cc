@@ -6,13 +6,21 @@
 
 #include <stddef.h>
 
+#include <algorithm>
+#include <iostream>
+#include <limits>
 #include <sstream>
+#include <utility>
 
 #include "base/command_line.h"
 #include "base/files/file_util.h"
+#include "base/json/json_reader.h"
+#include "base/json/json_writer.h"
 #include "base/macros.h"
+#include "base/strings/string_number_conversions.h"
 #include "base/strings/string_split.h"
 #include "base/strings/string_util.h"
+#include "base/values.h"
 #include "tools/gn/commands.h"
 #include "tools/gn/filesystem_utils.h"
 #include "tools/gn/input_file.h"
@@ -26,12 +34,14 @@ namespace commands {
 
 const char kSwitchDryRun[] = "dry-run";
 const char kSwitchDumpTree[] = "dump-tree";
+const char kSwitchLines[] = "lines";
+const char kSwitchServer[] = "server";
 const char kSwitchStdin[] = "stdin";
 
 const char kFormat[] = "format";
 const char kFormat_HelpShort[] = "format: Format .gn file.";
 const char kFormat_Help[] =
-    R"(gn format [--dump-tree] (--stdin | <build_file>)
+    R"(gn format [--dump-tree] [--lines=<range>] (--stdin | <build_file>)
 
   Formats .gn file to a standard format.
 
@@ -59,6 +69,22 @@ Arguments
       For debugging, dumps the parse tree to stdout and does not update the
       file or print formatted output.
 
+  --lines=<first>:<last>
+      Only valid with --stdin. Formats only the top-level statements that
+      overlap the given one-based, inclusive range of lines and leaves the
+      rest of the input unchanged.
+
+  --server
+      For editor integrations. Reads requests from stdin and writes one
+      response per request to stdout until stdin is closed, so that a single
+      gn process can format many times. Each request is a JSON dictionary on
+      one line with the input in "text" and an optional "lines" range with
+      the same meaning as --lines. Each response is a JSON dictionary on one
+      line with either an "error" message or a list of "edits" turning the
+      input into the formatted output. Each edit is a dictionary with the
+      zero-based range of input lines to replace ("begin" inclusive, "end"
+      exclusive) and the replacement "lines".
+
   --stdin
       Read input from stdin and write to stdout rather than update a file
       in-place.
@@ -68,6 +94,7 @@ Examples
   gn format some\\BUILD.gn
   gn format /abspath/some/BUILD.gn
   gn format --stdin
+  gn format --stdin --lines=10:20
 )";
 
 namespace {
@@ -80,6 +107,10 @@ const int kPenaltyHorizontalSeparation = 100;
 const int kPenaltyExcess = 10000;
 const int kPenaltyBrokenLineOnOneLiner = 5000;
 
+// The maximum number of inserted and deleted lines the line diff looks for.
+// Past that, the remaining differences are returned as a single edit.
+const int kMaxDiffCost = 2000;
+
 enum Precedence {
   kPrecedenceLowest,
   kPrecedenceAssign,
@@ -984,6 +1015,328 @@ std::string ReadStdin() {
   }
 }
 
+std::unique_ptr<ParseNode> ParseString(InputFile* file, Err* err) {
+  std::vector<Token> tokens = Tokenizer::Tokenize(file, err);
+  if (err->has_error())
+    return nullptr;
+  return Parser::Parse(tokens, err);
+}
+
+std::vector<base::StringPiece> SplitLines(base::StringPiece str) {
+  std::vector<base::StringPiece> lines = base::SplitStringPiece(
+      str, "\n", base::KEEP_WHITESPACE, base::SPLIT_WANT_ALL);
+  // A trailing newline doesn't start a new line.
+  if (!lines.empty() && lines.back().empty())
+    lines.pop_back();
+  return lines;
+}
+
+// Computes the edits turning the lines |a| into |b| with Myers' O(ND) diff
+// algorithm. Formatting usually changes few lines so this is fast even for
+// big files.
+std::vector<FormatEdit> DiffLines(const std::vector<base::StringPiece>& a,
+                                  const std::vector<base::StringPiece>& b) {
+  int prefix = 0;
+  while (prefix < static_cast<int>(std::min(a.size(), b.size())) &&
+         a[prefix] == b[prefix])
+    prefix++;
+  int suffix = 0;
+  while (suffix < static_cast<int>(std::min(a.size(), b.size())) - prefix &&
+         a[a.size() - suffix - 1] == b[b.size() - suffix - 1])
+    suffix++;
+  const int n = static_cast<int>(a.size()) - prefix - suffix;
+  const int m = static_cast<int>(b.size()) - prefix - suffix;
+  auto a_line = [&a, prefix](int i) { return a[prefix + i]; };
+  auto b_line = [&b, prefix](int i) { return b[prefix + i]; };
+
+  // The (x, y) indices of the lines kept from |a| as line |b|, in order.
+  std::vector<std::pair<int, int>> matches;
+  if (n > 0 && m > 0) {
+    // v[offset + k] is the furthest x reached on diagonal k = x - y. The
+    // values for each cost d are saved in |trace| to find the path back.
+    const int max_d = std::min(n + m, kMaxDiffCost);
+    const int offset = max_d + 1;
+    std::vector<int> v(2 * max_d + 3, 0);
+    std::vector<std::vector<int>> trace;
+    bool found = false;
+    for (int d = 0; d <= max_d && !found; d++) {
+      for (int k = -d; k <= d; k += 2) {
+        int x;
+        if (k == -d || (k != d && v[offset + k - 1] < v[offset + k + 1]))
+          x = v[offset + k + 1];
+        else
+          x = v[offset + k - 1] + 1;
+        int y = x - k;
+        while (x < n && y < m && a_line(x) == b_line(y)) {
+          x++;
+          y++;
+        }
+        v[offset + k] = x;
+        if (x >= n && y >= m) {
+          found = true;
+          break;
+        }
+      }
+      trace.emplace_back(v.begin() + offset - d, v.begin() + offset + d + 1);
+    }
+
+    if (found) {
+      int x = n;
+      int y = m;
+      for (int d = static_cast<int>(trace.size()) - 1; d > 0; d--) {
+        const std::vector<int>& prev = trace[d - 1];  // Indexed by k + d - 1.
+        int k = x - y;
+        int prev_k;
+        if (k == -d || (k != d && prev[k - 1 + d - 1] < prev[k + 1 + d - 1]))
+          prev_k = k + 1;
+        else
+          prev_k = k - 1;
+        int prev_x = prev[prev_k + d - 1];
+        // The diagonal run of matching lines starts after the insertion or
+        // deletion that left diagonal |prev_k|.
+        int run_begin = prev_k == k + 1 ? prev_x : prev_x + 1;
+        while (x > run_begin) {
+          x--;
+          y--;
+          matches.emplace_back(x, y);
+        }
+        x = prev_x;
+        y = prev_x - prev_k;
+      }
+      while (x > 0) {
+        x--;
+        y--;
+        matches.emplace_back(x, y);
+      }
+      std::reverse(matches.begin(), matches.end());
+    }
+  }
+
+  // Every gap between matching lines is an edit.
+  std::vector<FormatEdit> edits;
+  matches.emplace_back(n, m);
+  int x = 0;
+  int y = 0;
+  for (const auto& match : matches) {
+    if (match.first > x || match.second > y) {
+      FormatEdit edit;
+      edit.begin_line = prefix + x;
+      edit.end_line = prefix + match.first;
+      for (int i = y; i < match.second; i++)
+        edit.lines.push_back(b_line(i).as_string());
+      edits.push_back(std::move(edit));
+    }
+    x = match.first + 1;
+    y = match.second + 1;
+  }
+  return edits;
+}
+
+// Returns the first and last line of each top-level statement of the file
+// parsed as |root|.
+std::vector<std::pair<int, int>> GetStatementLines(const ParseNode* root) {
+  std::vector<std::pair<int, int>> statement_lines;
+  if (const BlockNode* block = root->AsBlock()) {
+    for (const auto& statement : block->statements()) {
+      LocationRange range = statement->GetRange();
+      statement_lines.push_back(std::make_pair(range.begin().line_number(),
+                                               range.end().line_number()));
+    }
+  }
+  return statement_lines;
+}
+
+// Returns the lines at which a file with the given statements and number of
+// lines is split into chunks, including the end of the file. A chunk normally
+// holds one top-level statement, but statements which share a line in either
+// |statement_lines| or |other_statement_lines| are kept in the same chunk so
+// that the chunks of both files stay paired. Comments and blank lines go with
+// the statement that follows them, and anything after the last statement goes
+// with it.
+std::vector<int> GetStatementChunkEnds(
+    const std::vector<std::pair<int, int>>& statement_lines,
+    const std::vector<std::pair<int, int>>& other_statement_lines,
+    int line_count) {
+  std::vector<int> chunk_ends;
+  for (size_t i = 1; i < statement_lines.size(); i++) {
+    if (statement_lines[i].first > statement_lines[i - 1].second &&
+        other_statement_lines[i].first > other_statement_lines[i - 1].second)
+      chunk_ends.push_back(statement_lines[i - 1].second);
+  }
+  chunk_ends.push_back(line_count);
+  return chunk_ends;
+}
+
+// Computes the edits for the top-level statements overlapping the zero-based
+// lines [begin, end). Each of those statements is diffed against the same
+// statement in the formatted output, so the lines of the other statements
+// are never changed.
+bool DiffLinesOfStatements(const ParseNode* input_root,
+                           const std::vector<base::StringPiece>& input_lines,
+                           const std::string& output,
+                           int begin,
+                           int end,
+                           std::vector<FormatEdit>* edits,
+                           Err* err) {
+  // Formatting keeps the top-level statements, so parsing the output finds
+  // where each of them went.
+  SourceFile source_file;
+  InputFile output_file(source_file);
+  output_file.SetContents(output);
+  std::unique_ptr<ParseNode> output_root = ParseString(&output_file, err);
+  if (err->has_error())
+    return false;
+  std::vector<base::StringPiece> output_lines = SplitLines(output);
+
+  std::vector<std::pair<int, int>> input_statements =
+      GetStatementLines(input_root);
+  std::vector<std::pair<int, int>> output_statements =
+      GetStatementLines(output_root.get());
+  if (input_statements.size() != output_statements.size()) {
+    *err = Err(Location(), "Unable to format a range of this file.",
+               "The formatted output has different top-level statements.");
+    return false;
+  }
+  std::vector<int> input_ends =
+      GetStatementChunkEnds(input_statements, output_statements,
+                            static_cast<int>(input_lines.size()));
+  std::vector<int> output_ends =
+      GetStatementChunkEnds(output_statements, input_statements,
+                            static_cast<int>(output_lines.size()));
+
+  edits->clear();
+  int input_begin = 0;
+  int output_begin = 0;
+  for (size_t i = 0; i < input_ends.size(); i++) {
+    int input_end = input_ends[i];
+    int output_end = output_ends[i];
+    // Empty chunks can only happen at the end of an empty file. Count them
+    // as overlapping a range that starts there.
+    if ((input_begin < end && input_end > begin) ||
+        (input_begin == input_end && input_begin == begin)) {
+      std::vector<FormatEdit> chunk_edits = DiffLines(
+          std::vector<base::StringPiece>(input_lines.begin() + input_begin,
+                                         input_lines.begin() + input_end),
+          std::vector<base::StringPiece>(output_lines.begin() + output_begin,
+                                         output_lines.begin() + output_end));
+      for (FormatEdit& edit : chunk_edits) {
+        edit.begin_line += input_begin;
+        edit.end_line += input_begin;
+        edits->push_back(std::move(edit));
+      }
+    }
+    input_begin = input_end;
+    output_begin = output_end;
+  }
+  return true;
+}
+
+std::string ApplyEdits(const std::string& input,
+                       const std::vector<FormatEdit>& edits) {
+  std::vector<base::StringPiece> lines = SplitLines(input);
+  std::string output;
+  int line = 0;
+  for (const FormatEdit& edit : edits) {
+    for (; line < edit.begin_line; line++) {
+      lines[line].AppendToString(&output);
+      output.push_back('\n');
+    }
+    for (const std::string& replacement : edit.lines) {
+      output.append(replacement);
+      output.push_back('\n');
+    }
+    line = edit.end_line;
+  }
+  for (; line < static_cast<int>(lines.size()); line++) {
+    lines[line].AppendToString(&output);
+    output.push_back('\n');
+  }
+  return output;
+}
+
+// Parses a --lines value or "lines" request field of the form
+// "<first>:<last>".
+bool ParseLineRange(const std::string& str,
+                    int* first_line,
+                    int* last_line,
+                    Err* err) {
+  std::vector<base::StringPiece> parts = base::SplitStringPiece(
+      str, ":", base::TRIM_WHITESPACE, base::SPLIT_WANT_ALL);
+  if (parts.size() != 2 || !base::StringToInt(parts[0], first_line) ||
+      !base::StringToInt(parts[1], last_line) || *first_line < 1 ||
+      *last_line < *first_line) {
+    *err = Err(Location(), "Invalid line range \"" + str + "\".",
+               "Expecting <first>:<last> with 1 <= first <= last.");
+    return false;
+  }
+  return true;
+}
+
+// Handles one --server request and returns the response.
+std::unique_ptr<base::DictionaryValue> RunServerRequest(
+    const std::string& request_json) {
+  auto response = std::make_unique<base::DictionaryValue>();
+
+  std::unique_ptr<base::Value> request = base::JSONReader::Read(request_json);
+  const base::DictionaryValue* request_dict = nullptr;
+  std::string text;
+  if (!request || !request->GetAsDictionary(&request_dict) ||
+      !request_dict->GetString("text", &text)) {
+    response->SetString("error", "Invalid request.");
+    return response;
+  }
+
+  Err err;
+  int first_line = 0;
+  int last_line = 0;
+  std::vector<FormatEdit> edits;
+  const base::Value* lines = request_dict->FindKey("lines");
+  if (lines && !lines->is_string()) {
+    err = Err(Location(), "Invalid line range.",
+              "Expecting a string of the form <first>:<last>.");
+  } else if (lines) {
+    ParseLineRange(lines->GetString(), &first_line, &last_line, &err);
+  }
+  if (!err.has_error() &&
+      FormatStringToEdits(text, first_line, last_line, &edits, &err)) {
+    auto edit_list = std::make_unique<base::ListValue>();
+    for (const FormatEdit& edit : edits) {
+      auto edit_dict = std::make_unique<base::DictionaryValue>();
+      edit_dict->SetInteger("begin", edit.begin_line);
+      edit_dict->SetInteger("end", edit.end_line);
+      auto line_list = std::make_unique<base::ListValue>();
+      for (const std::string& line : edit.lines)
+        line_list->AppendString(line);
+      edit_dict->Set("lines", std::move(line_list));
+      edit_list->Append(std::move(edit_dict));
+    }
+    response->Set("edits", std::move(edit_list));
+  } else {
+    std::string message = err.message();
+    if (err.location().line_number() > 0) {
+      message = "Line " + base::IntToString(err.location().line_number()) +
+                ": " + message;
+    }
+    if (!err.help_text().empty())
+      message += "\n" + err.help_text();
+    response->SetString("error", message);
+  }
+  return response;
+}
+
+int RunServer() {
+  std::string request;
+  while (std::getline(std::cin, request)) {
+    if (request.empty())
+      continue;
+    std::string response;
+    base::JSONWriter::Write(*RunServerRequest(request), &response);
+    printf("%s\n", response.c_str());
+    fflush(stdout);
+  }
+  return 0;
+}
+
 }  // namespace
 
 bool FormatFileToString(Setup* setup,
@@ -1009,15 +1362,7 @@ bool FormatStringToString(const std::string& input,
   InputFile file(source_file);
   file.SetContents(input);
   Err err;
-  // Tokenize.
-  std::vector<Token> tokens = Tokenizer::Tokenize(&file, &err);
-  if (err.has_error()) {
-    err.PrintToStdout();
-    return false;
-  }
-
-  // Parse.
-  std::unique_ptr<ParseNode> parse_node = Parser::Parse(tokens, &err);
+  std::unique_ptr<ParseNode> parse_node = ParseString(&file, &err);
   if (err.has_error()) {
     err.PrintToStdout();
     return false;
@@ -1027,6 +1372,29 @@ bool FormatStringToString(const std::string& input,
   return true;
 }
 
+bool FormatStringToEdits(const std::string& input,
+                         int first_line,
+                         int last_line,
+                         std::vector<FormatEdit>* edits,
+                         Err* err) {
+  SourceFile source_file;
+  InputFile file(source_file);
+  file.SetContents(input);
+  std::unique_ptr<ParseNode> parse_node = ParseString(&file, err);
+  if (err->has_error())
+    return false;
+
+  std::string output;
+  DoFormat(parse_node.get(), false, &output);
+  std::vector<base::StringPiece> input_lines = SplitLines(input);
+  if (first_line == 0) {
+    *edits = DiffLines(input_lines, SplitLines(output));
+    return true;
+  }
+  return DiffLinesOfStatements(parse_node.get(), input_lines, output,
+                               first_line - 1, last_line, edits, err);
+}
+
 int RunFormat(const std::vector<std::string>& args) {
   bool dry_run =
       base::CommandLine::ForCurrentProcess()->HasSwitch(kSwitchDryRun);
@@ -1035,6 +1403,33 @@ int RunFormat(const std::vector<std::string>& args) {
   bool from_stdin =
       base::CommandLine::ForCurrentProcess()->HasSwitch(kSwitchStdin);
 
+  if (base::CommandLine::ForCurrentProcess()->HasSwitch(kSwitchServer)) {
+    if (args.size() != 0) {
+      Err(Location(), "Expecting no arguments with --server.\n")
+          .PrintToStdout();
+      return 1;
+    }
+    return RunServer();
+  }
+
+  int first_line = 0;
+  int last_line = 0;
+  if (base::CommandLine::ForCurrentProcess()->HasSwitch(kSwitchLines)) {
+    Err err;
+    if (!from_stdin || dry_run || dump_tree) {
+      err = Err(Location(), "--lines is only supported with --stdin.");
+    } else {
+      ParseLineRange(
+          base::CommandLine::ForCurrentProcess()->GetSwitchValueASCII(
+              kSwitchLines),
+          &first_line, &last_line, &err);
+    }
+    if (err.has_error()) {
+      err.PrintToStdout();
+      return 1;
+    }
+  }
+
   if (dry_run) {
     // --dry-run only works with an actual file to compare to.
     from_stdin = false;
@@ -1048,8 +1443,17 @@ int RunFormat(const std::vector<std::string>& args) {
     }
     std::string input = ReadStdin();
     std::string output;
-    if (!FormatStringToString(input, dump_tree, &output))
+    if (first_line > 0) {
+      Err err;
+      std::vector<FormatEdit> edits;
+      if (!FormatStringToEdits(input, first_line, last_line, &edits, &err)) {
+        err.PrintToStdout();
+        return 1;
+      }
+      output = ApplyEdits(input, edits);
+    } else if (!FormatStringToString(input, dump_tree, &output)) {
       return 1;
+    }
     printf("%s", output.c_str());
     return 0;
   }
@@ -6,12 +6,25 @@
 #define TOOLS_GN_COMAND_FORMAT_H_
 
 #include <string>
+#include <vector>
 
+class Err;
 class Setup;
 class SourceFile;
 
 namespace commands {
 
+// A replacement of a block of lines, as returned by FormatStringToEdits().
+struct FormatEdit {
+  // The zero-based range [begin_line, end_line) of input lines to replace.
+  // This is empty for an insertion before begin_line.
+  int begin_line;
+  int end_line;
+
+  // The replacement lines, without line endings.
+  std::vector<std::string> lines;
+};
+
 bool FormatFileToString(Setup* setup,
                         const SourceFile& file,
                         bool dump_tree,
@@ -21,6 +34,20 @@ bool FormatStringToString(const std::string& input,
                           bool dump_tree,
                           std::string* output);
 
+// Formats |input| and computes the line edits that turn it into the formatted
+// output, rather than returning the whole output. The edits are ordered and
+// don't overlap.
+//
+// If |first_line| is nonzero, only the top-level statements overlapping the
+// lines |first_line| to |last_line| (one-based, inclusive) are formatted, so
+// that e.g. sorting a list is never applied partially. The lines of the other
+// statements are left unchanged.
+bool FormatStringToEdits(const std::string& input,
+                         int first_line,
+                         int last_line,
+                         std::vector<FormatEdit>* edits,
+                         Err* err);
+
 }  // namespace commands
 
 #endif  // TOOLS_GN_COMAND_FORMAT_H_
@@ -5,14 +5,37 @@
 #include "tools/gn/command_format.h"
 
 #include "base/files/file_util.h"
+#include "base/strings/string_split.h"
 #include "base/strings/string_util.h"
+#include "base/strings/stringprintf.h"
 #include "test/test.h"
 #include "tools/gn/commands.h"
+#include "tools/gn/err.h"
 #include "tools/gn/setup.h"
 #include "tools/gn/test_with_scheduler.h"
 
 using FormatTest = TestWithScheduler;
 
+namespace {
+
+std::string ApplyEdits(const std::string& input,
+                       const std::vector<commands::FormatEdit>& edits) {
+  std::vector<std::string> lines = base::SplitString(
+      input, "\n", base::KEEP_WHITESPACE, base::SPLIT_WANT_ALL);
+  if (!lines.empty() && lines.back().empty())
+    lines.pop_back();
+  // Apply the edits back to front so the line numbers stay valid.
+  for (auto edit = edits.rbegin(); edit != edits.rend(); ++edit) {
+    lines.erase(lines.begin() + edit->begin_line,
+                lines.begin() + edit->end_line);
+    lines.insert(lines.begin() + edit->begin_line, edit->lines.begin(),
+                 edit->lines.end());
+  }
+  return base::JoinString(lines, "\n") + "\n";
+}
+
+}  // namespace
+
 #define FORMAT_TEST(n)                                                      \
   TEST_F(FormatTest, n) {                                                   \
     ::Setup setup;                                                          \
@@ -102,3 +125,169 @@ FORMAT_TEST(067)
 FORMAT_TEST(068)
 FORMAT_TEST(069)
 FORMAT_TEST(070)
+
+// Applying the edits for the whole file should give the formatted output.
+TEST(FormatStringToEdits, WholeFile) {
+  for (int i = 1; i <= 70; i++) {
+    // 049 doesn't parse, see above.
+    if (i == 49)
+      continue;
+    std::string input;
+    ASSERT_TRUE(base::ReadFileToString(
+        base::FilePath(FILE_PATH_LITERAL("tools/gn/format_test_data"))
+            .AppendASCII(base::StringPrintf("%03d.gn", i)),
+        &input));
+    std::string expected;
+    ASSERT_TRUE(commands::FormatStringToString(input, false, &expected));
+
+    Err err;
+    std::vector<commands::FormatEdit> edits;
+    ASSERT_TRUE(commands::FormatStringToEdits(input, 0, 0, &edits, &err));
+    EXPECT_EQ(expected, ApplyEdits(input, edits));
+  }
+}
+
+TEST(FormatStringToEdits, MinimalEdits) {
+  const char kInput[] =
+      "a = 1\n"
+      "b =   2\n"
+      "c = 3\n";
+  Err err;
+  std::vector<commands::FormatEdit> edits;
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 0, 0, &edits, &err));
+  ASSERT_EQ(1u, edits.size());
+  EXPECT_EQ(1, edits[0].begin_line);
+  EXPECT_EQ(2, edits[0].end_line);
+  ASSERT_EQ(1u, edits[0].lines.size());
+  EXPECT_EQ("b = 2", edits[0].lines[0]);
+}
+
+TEST(FormatStringToEdits, LineRange) {
+  const char kInput[] =
+      "a =   1\n"
+      "sources = [\n"
+      "  \"c.cc\",\n"
+      "  \"b.cc\",\n"
+      "  \"a.cc\",\n"
+      "]\n"
+      "d =   4\n";
+  Err err;
+  std::vector<commands::FormatEdit> edits;
+
+  // Only the first statement.
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 1, 1, &edits, &err));
+  EXPECT_EQ(
+      "a = 1\n"
+      "sources = [\n"
+      "  \"c.cc\",\n"
+      "  \"b.cc\",\n"
+      "  \"a.cc\",\n"
+      "]\n"
+      "d =   4\n",
+      ApplyEdits(kInput, edits));
+
+  // A range in the middle of the list sorts the whole list, and leaves the
+  // other statements alone.
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 4, 4, &edits, &err));
+  EXPECT_EQ(
+      "a =   1\n"
+      "sources = [\n"
+      "  \"a.cc\",\n"
+      "  \"b.cc\",\n"
+      "  \"c.cc\",\n"
+      "]\n"
+      "d =   4\n",
+      ApplyEdits(kInput, edits));
+
+  // A range past the end of the file formats the last statement.
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 7, 100, &edits, &err));
+  ASSERT_EQ(1u, edits.size());
+  EXPECT_EQ(6, edits[0].begin_line);
+  EXPECT_EQ(7, edits[0].end_line);
+}
+
+// Every statement needs formatting, only the selected ones should change.
+TEST(FormatStringToEdits, AdjacentStatements) {
+  Err err;
+  std::vector<commands::FormatEdit> edits;
+
+  const char kInput[] =
+      "a =   1\n"
+      "b =   2\n"
+      "c =   3\n";
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 2, 2, &edits, &err));
+  ASSERT_EQ(1u, edits.size());
+  EXPECT_EQ(1, edits[0].begin_line);
+  EXPECT_EQ(2, edits[0].end_line);
+  EXPECT_EQ(
+      "a =   1\n"
+      "b = 2\n"
+      "c =   3\n",
+      ApplyEdits(kInput, edits));
+
+  ASSERT_TRUE(commands::FormatStringToEdits(kInput, 2, 3, &edits, &err));
+  EXPECT_EQ(
+      "a =   1\n"
+      "b = 2\n"
+      "c = 3\n",
+      ApplyEdits(kInput, edits));
+
+  // Comments go with the statement after them, and blocks are formatted as a
+  // whole.
+  const char kBlockInput[] =
+      "# Comment for a.\n"
+      "a =   1\n"
+      "foo(\"x\") {\n"
+      "  y =   2\n"
+      "}\n"
+      "z =   3\n";
+  ASSERT_TRUE(commands::FormatStringToEdits(kBlockInput, 4, 4, &edits, &err));
+  EXPECT_EQ(
+      "# Comment for a.\n"
+      "a =   1\n"
+      "foo(\"x\") {\n"
+      "  y = 2\n"
+      "}\n"
+      "z =   3\n",
+      ApplyEdits(kBlockInput, edits));
+  ASSERT_TRUE(commands::FormatStringToEdits(kBlockInput, 1, 1, &edits, &err));
+  EXPECT_EQ(
+      "# Comment for a.\n"
+      "a = 1\n"
+      "foo(\"x\") {\n"
+      "  y =   2\n"
+      "}\n"
+      "z =   3\n",
+      ApplyEdits(kBlockInput, edits));
+
+  // Statements sharing a line are formatted together.
+  const char kSameLineInput[] =
+      "a = 1  b = 2\n"
+      "c =   3\n";
+  ASSERT_TRUE(
+      commands::FormatStringToEdits(kSameLineInput, 1, 1, &edits, &err));
+  EXPECT_EQ(
+      "a = 1\n"
+      "b = 2\n"
+      "c =   3\n",
+      ApplyEdits(kSameLineInput, edits));
+
+  const char kSameEndLineInput[] =
+      "a = [\n"
+      "  1 ]  b =   2\n"
+      "c =   3\n";
+  ASSERT_TRUE(
+      commands::FormatStringToEdits(kSameEndLineInput, 1, 1, &edits, &err));
+  EXPECT_EQ(
+      "a = [ 1 ]\n"
+      "b = 2\n"
+      "c =   3\n",
+      ApplyEdits(kSameEndLineInput, edits));
+}
+
+TEST(FormatStringToEdits, ParseError) {
+  Err err;
+  std::vector<commands::FormatEdit> edits;
+  EXPECT_FALSE(commands::FormatStringToEdits("a = [", 0, 0, &edits, &err));
+  EXPECT_TRUE(err.has_error());
+}
@@ -6,6 +6,8 @@
 #include <iostream>
 
 #include "base/command_line.h"
+#include "base/json/json_writer.h"
+#include "base/values.h"
 #include "tools/gn/args.h"
 #include "tools/gn/commands.h"
 #include "tools/gn/err.h"
@@ -28,6 +30,37 @@ namespace commands {
 
 namespace {
 
+// Help topics that aren't a command, function, variable or switch.
+struct OtherHelpTopic {
+  const char* name;
+  const char* help_short;
+  const char* help;
+};
+
+const OtherHelpTopic kOtherHelpTopics[] = {
+    {"buildargs", "buildargs: How build arguments work.", kBuildArgs_Help},
+    {"dotfile", "dotfile: Info about the toplevel .gn file.", kDotfile_Help},
+    {"execution", "execution: Build graph and execution overview.",
+     kExecution_Help},
+    {"grammar", "grammar: Language and grammar for GN build files.",
+     kGrammar_Help},
+    {"input_conversion",
+     "input_conversion: Processing input from exec_script and read_file.",
+     kInputConversion_Help},
+    {"label_pattern", "label_pattern: Matching more than one label.",
+     kLabelPattern_Help},
+    {"labels", "labels: About labels.", kLabels_Help},
+    {"ninja_rules", "ninja_rules: How Ninja build rules are named.",
+     kNinjaRules_Help},
+    {"nogncheck", "nogncheck: Annotating includes for checking.",
+     kNoGnCheck_Help},
+    {"runtime_deps", "runtime_deps: How runtime dependency computation works.",
+     kRuntimeDeps_Help},
+    {"source_expansion",
+     "source_expansion: Map sources to outputs for scripts.",
+     kSourceExpansion_Help},
+};
+
 void PrintToplevelHelp() {
   PrintSectionHelp("Commands", "<command>", "commands");
   for (const auto& cmd : commands::GetCommands())
@@ -61,18 +94,8 @@ void PrintToplevelHelp() {
 
   PrintSectionHelp("Other help topics", "", "other");
   PrintShortHelp("all: Print all the help at once");
-  PrintShortHelp("buildargs: How build arguments work.");
-  PrintShortHelp("dotfile: Info about the toplevel .gn file.");
-  PrintShortHelp("execution: Build graph and execution overview.");
-  PrintShortHelp("grammar: Language and grammar for GN build files.");
-  PrintShortHelp(
-      "input_conversion: Processing input from exec_script and read_file.");
-  PrintShortHelp("label_pattern: Matching more than one label.");
-  PrintShortHelp("labels: About labels.");
-  PrintShortHelp("ninja_rules: How Ninja build rules are named.");
-  PrintShortHelp("nogncheck: Annotating includes for checking.");
-  PrintShortHelp("runtime_deps: How runtime dependency computation works.");
-  PrintShortHelp("source_expansion: Map sources to outputs for scripts.");
+  for (const auto& topic : kOtherHelpTopics)
+    PrintShortHelp(topic.help_short);
   PrintShortHelp("switches: Show available command-line switches.");
 }
 
@@ -154,23 +177,86 @@ void PrintAllHelp() {
 
   if (is_markdown)
     OutputString("## <a name=\"other\"></a>Other help topics\n\n");
-  PrintLongHelp(kBuildArgs_Help, "buildargs");
-  PrintLongHelp(kDotfile_Help, "dotfile");
-  PrintLongHelp(kExecution_Help, "execution");
-  PrintLongHelp(kGrammar_Help, "grammar");
-  PrintLongHelp(kInputConversion_Help, "input_conversion");
-  PrintLongHelp(kLabelPattern_Help, "label_pattern");
-  PrintLongHelp(kLabels_Help, "labels");
-  PrintLongHelp(kNinjaRules_Help, "ninja_rules");
-  PrintLongHelp(kNoGnCheck_Help, "nogncheck");
-  PrintLongHelp(kRuntimeDeps_Help, "runtime_deps");
-  PrintLongHelp(kSourceExpansion_Help, "source_expansion");
+  for (const auto& topic : kOtherHelpTopics)
+    PrintLongHelp(topic.help, topic.name);
 
   if (is_markdown)
     OutputString("## <a name=\"switches\"></a>Command Line Switches\n\n");
   PrintSwitchHelp();
 }
 
+// Adds a section of help topics to |sections| and returns its list of topics.
+base::ListValue* AddJSONHelpSection(base::ListValue* sections,
+                                    const char* anchor,
+                                    const char* title) {
+  auto section = std::make_unique<base::DictionaryValue>();
+  section->SetString("anchor", anchor);
+  section->SetString("title", title);
+  base::ListValue* topics =
+      section->SetList("topics", std::make_unique<base::ListValue>());
+  sections->Append(std::move(section));
+  return topics;
+}
+
+void AddJSONHelpTopic(base::ListValue* topics,
+                      base::StringPiece name,
+                      const char* help_short,
+                      const char* help) {
+  auto topic = std::make_unique<base::DictionaryValue>();
+  topic->SetString("name", name);
+  topic->SetString("help_short", help_short);
+  topic->SetString("help", help);
+  topics->Append(std::move(topic));
+}
+
+// Prints the same topics as PrintAllHelp() as JSON, with the raw help text,
+// so that tools can render it without running gn for each topic.
+void PrintAllHelpAsJSON() {
+  base::DictionaryValue result;
+  base::ListValue* sections =
+      result.SetList("sections", std::make_unique<base::ListValue>());
+
+  base::ListValue* topics =
+      AddJSONHelpSection(sections, "commands", "Commands");
+  for (const auto& c : commands::GetCommands())
+    AddJSONHelpTopic(topics, c.first, c.second.help_short, c.second.help);
+
+  topics = AddJSONHelpSection(sections, "targets", "Target declarations");
+  for (const auto& f : functions::GetFunctions()) {
+    if (f.second.is_target)
+      AddJSONHelpTopic(topics, f.first, f.second.help_short, f.second.help);
+  }
+
+  topics = AddJSONHelpSection(sections, "functions", "Buildfile functions");
+  for (const auto& f : functions::GetFunctions()) {
+    if (!f.second.is_target)
+      AddJSONHelpTopic(topics, f.first, f.second.help_short, f.second.help);
+  }
+
+  topics = AddJSONHelpSection(sections, "predefined_variables",
+                              "Built-in predefined variables");
+  for (const auto& v : variables::GetBuiltinVariables())
+    AddJSONHelpTopic(topics, v.first, v.second.help_short, v.second.help);
+
+  topics = AddJSONHelpSection(sections, "target_variables",
+                              "Variables you set in targets");
+  for (const auto& v : variables::GetTargetVariables())
+    AddJSONHelpTopic(topics, v.first, v.second.help_short, v.second.help);
+
+  topics = AddJSONHelpSection(sections, "other", "Other help topics");
+  for (const auto& topic : kOtherHelpTopics)
+    AddJSONHelpTopic(topics, topic.name, topic.help_short, topic.help);
+
+  topics = AddJSONHelpSection(sections, "switches", "Command Line Switches");
+  for (const auto& s : switches::GetSwitches())
+    AddJSONHelpTopic(topics, s.first, s.second.short_help, s.second.long_help);
+
+  std::string json;
+  base::JSONWriter::WriteWithOptions(
+      result, base::JSONWriter::OPTIONS_PRETTY_PRINT, &json);
+  OutputString(json);
+}
+
 // Prints help on the given switch. There should be no leading hyphens. Returns
 // true if the switch was found and help was printed. False means the switch is
 // unknown.
@@ -198,13 +284,20 @@ const char kHelp_Help[] =
 
 Switches
 
+  --format=json
+      Only with "all". Dump every help topic with its raw text as JSON, for
+      tools that render the reference in other formats.
+
   --markdown
       Format output in markdown syntax.
 
-Example
+Examples
 
   gn help --markdown all
       Dump all help to stdout in markdown format.
+
+  gn help --format=json all
+      Dump all help to stdout as JSON.
 )";
 
 int RunHelp(const std::vector<std::string>& args) {
@@ -274,22 +367,20 @@ int RunHelp(const std::vector<std::string>& args) {
     return 0;
 
   // Random other topics.
+  for (const auto& topic : kOtherHelpTopics) {
+    if (what == topic.name) {
+      PrintLongHelp(topic.help);
+      return 0;
+    }
+    all_help_topics.push_back(topic.name);
+  }
   std::map<std::string, void (*)()> random_topics;
-  random_topics["all"] = PrintAllHelp;
-  random_topics["execution"] = []() { PrintLongHelp(kExecution_Help); };
-  random_topics["buildargs"] = []() { PrintLongHelp(kBuildArgs_Help); };
-  random_topics["dotfile"] = []() { PrintLongHelp(kDotfile_Help); };
-  random_topics["grammar"] = []() { PrintLongHelp(kGrammar_Help); };
-  random_topics["input_conversion"] = []() {
-    PrintLongHelp(kInputConversion_Help);
-  };
-  random_topics["label_pattern"] = []() { PrintLongHelp(kLabelPattern_Help); };
-  random_topics["labels"] = []() { PrintLongHelp(kLabels_Help); };
-  random_topics["ninja_rules"] = []() { PrintLongHelp(kNinjaRules_Help); };
-  random_topics["nogncheck"] = []() { PrintLongHelp(kNoGnCheck_Help); };
-  random_topics["runtime_deps"] = []() { PrintLongHelp(kRuntimeDeps_Help); };
-  random_topics["source_expansion"] = []() {
-    PrintLongHelp(kSourceExpansion_Help);
+  random_topics["all"] = []() {
+    if (base::CommandLine::ForCurrentProcess()->GetSwitchValueASCII("format") ==
+        "json")
+      PrintAllHelpAsJSON();
+    else
+      PrintAllHelp();
   };
   random_topics["switches"] = PrintSwitchHelp;
   auto found_random_topic = random_topics.find(what);
@@ -14,6 +14,7 @@
 #include "tools/gn/item.h"
 #include "tools/gn/label.h"
 #include "tools/gn/label_pattern.h"
+#include "tools/gn/label_pattern_set.h"
 #include "tools/gn/setup.h"
 #include "tools/gn/standard_out.h"
 #include "tools/gn/target.h"
@@ -461,26 +462,20 @@ bool ResolveFromCommandLineInput(
 void FilterTargetsByPatterns(const std::vector<const Target*>& input,
                              const std::vector<LabelPattern>& filter,
                              std::vector<const Target*>* output) {
+  LabelPatternSet filter_set(filter);
   for (auto* target : input) {
-    for (const auto& pattern : filter) {
-      if (pattern.Matches(target->label())) {
-        output->push_back(target);
-        break;
-      }
-    }
+    if (filter_set.Matches(target->label()))
+      output->push_back(target);
   }
 }
 
 void FilterTargetsByPatterns(const std::vector<const Target*>& input,
                              const std::vector<LabelPattern>& filter,
                              UniqueVector<const Target*>* output) {
+  LabelPatternSet filter_set(filter);
   for (auto* target : input) {
-    for (const auto& pattern : filter) {
-      if (pattern.Matches(target->label())) {
-        output->push_back(target);
-        break;
-      }
-    }
+    if (filter_set.Matches(target->label()))
+      output->push_back(target);
   }
 }
 
@@ -2,6 +2,7 @@
 // Use of this source code is governed by a BSD-style license that can be
 // found in the LICENSE file.
 
+#include "base/strings/string_number_conversions.h"
 #include "test/test.h"
 #include "tools/gn/test_with_scope.h"
 
@@ -27,3 +28,43 @@ TEST(FunctionTemplate, MarkUsed) {
   setup.scope()->CheckForUnusedVars(&err);
   EXPECT_FALSE(err.has_error());
 }
+
+// Forwards a large list through five levels of templates, like the .gni
+// templates that wrap each other. Copies of the list share its storage, so
+// this stays fast however deep the nesting is. The elapsed time of this test
+// can be compared between builds with --test_timings_json.
+TEST(FunctionTemplate, NestedForwarding) {
+  TestWithScope setup;
+  std::string program = "big = [";
+  for (int i = 0; i < 3000; i++)
+    program += "\"file" + base::IntToString(i) + ".cc\", ";
+  program +=
+      "]\n"
+      "template(\"t1\") {\n"
+      "  forward_variables_from(invoker, \"*\")\n"
+      "  assert(sources == big)\n"
+      "}\n";
+  for (int level = 2; level <= 5; level++) {
+    std::string inner = "t" + base::IntToString(level - 1);
+    program += "template(\"t" + base::IntToString(level) + "\") {\n"
+               "  " + inner + "(target_name) {\n"
+               "    forward_variables_from(invoker, \"*\")\n"
+               "  }\n"
+               "}\n";
+  }
+  program += "foreach(i, [";
+  for (int i = 0; i < 100; i++)
+    program += base::IntToString(i) + ", ";
+  program +=
+      "]) {\n"
+      "  t5(\"target$i\") {\n"
+      "    sources = big\n"
+      "  }\n"
+      "}\n";
+  TestParseInput input(program);
+  ASSERT_FALSE(input.has_error());
+
+  Err err;
+  input.parsed()->Execute(setup.scope(), &err);
+  EXPECT_FALSE(err.has_error());
+}
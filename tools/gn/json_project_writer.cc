@@ -4,18 +4,23 @@
 
 #include "tools/gn/json_project_writer.h"
 
+#include <algorithm>
+#include <fstream>
 #include <iostream>
 #include <memory>
+#include <utility>
 
 #include "base/command_line.h"
-#include "base/json/json_writer.h"
+#include "base/files/file_util.h"
 #include "base/strings/string_number_conversions.h"
+#include "base/values.h"
 #include "tools/gn/builder.h"
 #include "tools/gn/commands.h"
 #include "tools/gn/deps_iterator.h"
 #include "tools/gn/desc_builder.h"
 #include "tools/gn/exec_process.h"
 #include "tools/gn/filesystem_utils.h"
+#include "tools/gn/json_stream_writer.h"
 #include "tools/gn/settings.h"
 
 // Structure of JSON output file
@@ -71,25 +76,46 @@ bool FilterTargets(const BuildSettings* build_settings,
     targets->insert(targets->end(), target_set.begin(), target_set.end());
   }
 
-  // Sort the list of targets per-label to get a consistent ordering of them
-  // in the generated project (and thus stability of the file generated).
-  std::sort(targets->begin(), targets->end(),
-            [](const Target* a, const Target* b) {
-              return a->label().name() < b->label().name();
-            });
-
   return true;
 }
 
-std::string RenderJSON(const BuildSettings* build_settings,
-                       const Builder& builder,
-                       std::vector<const Target*>& all_targets) {
+// Writes the JSON description of the given targets to the stream. Targets are
+// described and written one at a time so the whole document is never held in
+// memory.
+void RenderJSON(const BuildSettings* build_settings,
+                const std::vector<const Target*>& all_targets,
+                std::ostream& out) {
   Label default_toolchain_label;
+  if (!all_targets.empty()) {
+    default_toolchain_label =
+        all_targets[0]->settings()->default_toolchain_label();
+  }
 
-  auto targets = std::make_unique<base::DictionaryValue>();
+  // JSON dictionaries are written in key order, which also gives a consistent
+  // ordering of the targets in the generated project (and thus stability of
+  // the file generated).
+  std::vector<std::pair<std::string, const Target*>> named_targets;
+  named_targets.reserve(all_targets.size());
   for (const auto* target : all_targets) {
-    if (default_toolchain_label.is_null())
-      default_toolchain_label = target->settings()->default_toolchain_label();
+    named_targets.emplace_back(
+        target->label().GetUserVisibleName(default_toolchain_label), target);
+  }
+  std::sort(named_targets.begin(), named_targets.end());
+
+  JSONDictionaryStreamWriter output(out, 0);
+
+  base::DictionaryValue settings;
+  settings.SetKey("root_path", base::Value(build_settings->root_path_utf8()));
+  settings.SetKey("build_dir",
+                  base::Value(build_settings->build_dir().value()));
+  settings.SetKey(
+      "default_toolchain",
+      base::Value(default_toolchain_label.GetUserVisibleName(false)));
+  output.Write("build_settings", settings);
+
+  JSONDictionaryStreamWriter targets(out, output.BeginDictionary("targets"));
+  for (const auto& pair : named_targets) {
+    const Target* target = pair.second;
     auto description =
         DescBuilder::DescriptionForTarget(target, "", false, false, false);
     // Outputs need to be asked for separately.
@@ -100,27 +126,11 @@ std::string RenderJSON(const BuildSettings* build_settings,
         !outputs_value->empty()) {
       description->MergeDictionary(outputs.get());
     }
-    targets->SetWithoutPathExpansion(
-        target->label().GetUserVisibleName(default_toolchain_label),
-        std::move(description));
+    targets.Write(pair.first, *description);
   }
+  targets.Close();
 
-  auto settings = std::make_unique<base::DictionaryValue>();
-  settings->SetKey("root_path", base::Value(build_settings->root_path_utf8()));
-  settings->SetKey("build_dir",
-                   base::Value(build_settings->build_dir().value()));
-  settings->SetKey(
-      "default_toolchain",
-      base::Value(default_toolchain_label.GetUserVisibleName(false)));
-
-  auto output = std::make_unique<base::DictionaryValue>();
-  output->SetWithoutPathExpansion("targets", std::move(targets));
-  output->SetWithoutPathExpansion("build_settings", std::move(settings));
-
-  std::string s;
-  base::JSONWriter::WriteWithOptions(
-      *output.get(), base::JSONWriter::OPTIONS_PRETTY_PRINT, &s);
-  return s;
+  output.Close();
 }
 
 bool InvokePython(const BuildSettings* build_settings,
@@ -192,9 +202,37 @@ bool JSONProjectWriter::RunAndWriteFiles(
     return false;
   }
 
-  std::string json = RenderJSON(build_settings, builder, targets);
-  if (!ContentsEqual(output_path, json)) {
-    if (!WriteFileIfChanged(output_path, json, err)) {
+  // The output can be very large, so stream it to a temporary file rather
+  // than building it in memory. The real file is only replaced (and the
+  // script run) when the contents changed.
+  base::FilePath temp_path = output_path.AddExtension(FILE_PATH_LITERAL("tmp"));
+  if (!base::CreateDirectory(output_path.DirName())) {
+    *err =
+        Err(Location(), "Unable to create directory.",
+            "I was using \"" + FilePathToUTF8(output_path.DirName()) + "\".");
+    return false;
+  }
+  {
+    std::ofstream file(FilePathToUTF8(temp_path).c_str(),
+                       std::ios_base::out | std::ios_base::binary);
+    if (!file.fail())
+      RenderJSON(build_settings, targets, file);
+    file.close();
+    if (file.fail()) {
+      *err = Err(Location(), "Unable to write file.",
+                 "I was writing \"" + FilePathToUTF8(temp_path) + "\".");
+      base::DeleteFile(temp_path, false);
+      return false;
+    }
+  }
+
+  if (base::ContentsEqual(temp_path, output_path)) {
+    base::DeleteFile(temp_path, false);
+  } else {
+    if (!base::ReplaceFile(temp_path, output_path, nullptr)) {
+      *err = Err(Location(), "Unable to write file.",
+                 "I was replacing \"" + FilePathToUTF8(output_path) + "\".");
+      base::DeleteFile(temp_path, false);
       return false;
     }
 
@@ -0,0 +1,103 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#include "tools/gn/json_stream_writer.h"
+
+#include <string.h>
+
+#include <ostream>
+
+#include "base/json/json_writer.h"
+#include "base/json/string_escape.h"
+#include "base/logging.h"
+#include "base/values.h"
+#include "build_config.h"
+
+namespace {
+
+// These must match base::JSONWriter.
+#if defined(OS_WIN)
+const char kLineEnding[] = "\r\n";
+#else
+const char kLineEnding[] = "\n";
+#endif
+const size_t kIndentSize = 3;
+
+void WriteIndent(std::ostream& out, size_t depth) {
+  for (size_t i = 0; i < depth * kIndentSize; i++)
+    out << ' ';
+}
+
+}  // namespace
+
+JSONDictionaryStreamWriter::JSONDictionaryStreamWriter(std::ostream& out,
+                                                       size_t depth)
+    : out_(out), depth_(depth) {
+  out_ << '{' << kLineEnding;
+}
+
+JSONDictionaryStreamWriter::~JSONDictionaryStreamWriter() {
+  DCHECK(closed_);
+}
+
+void JSONDictionaryStreamWriter::Write(const std::string& key,
+                                       const base::Value& value) {
+  WriteKey(key);
+
+  // Serialize the value on its own and shift every line after the first one
+  // to the current depth. Newlines can only come from the pretty printing
+  // since newlines in strings are escaped. Empty lines (JSONWriter writes one
+  // for an empty dictionary) are not indented.
+  std::string json;
+  base::JSONWriter::WriteWithOptions(
+      value, base::JSONWriter::OPTIONS_PRETTY_PRINT, &json);
+  size_t end = json.size() - strlen(kLineEnding);
+  DCHECK_EQ(json.compare(end, std::string::npos, kLineEnding), 0);
+
+  size_t line_begin = 0;
+  while (line_begin < end) {
+    size_t newline = json.find('\n', line_begin);
+    if (newline == std::string::npos || newline >= end) {
+      out_.write(&json[line_begin], end - line_begin);
+      break;
+    }
+    out_.write(&json[line_begin], newline + 1 - line_begin);
+    line_begin = newline + 1;
+    if (json[line_begin] != '\r' && json[line_begin] != '\n')
+      WriteIndent(out_, depth_ + 1);
+  }
+}
+
+size_t JSONDictionaryStreamWriter::BeginDictionary(const std::string& key) {
+  WriteKey(key);
+  return depth_ + 1;
+}
+
+void JSONDictionaryStreamWriter::Close() {
+  DCHECK(!closed_);
+  closed_ = true;
+
+  out_ << kLineEnding;
+  WriteIndent(out_, depth_);
+  out_ << '}';
+  if (depth_ == 0)
+    out_ << kLineEnding;
+}
+
+void JSONDictionaryStreamWriter::WriteKey(const std::string& key) {
+  DCHECK(!closed_);
+  DCHECK(!has_entries_ || last_key_ < key) << "Keys must be sorted.";
+#if DCHECK_IS_ON()
+  last_key_ = key;
+#endif
+
+  if (has_entries_)
+    out_ << ',' << kLineEnding;
+  has_entries_ = true;
+
+  WriteIndent(out_, depth_ + 1);
+  std::string escaped_key;
+  base::EscapeJSONString(key, true, &escaped_key);
+  out_ << escaped_key << ": ";
+}
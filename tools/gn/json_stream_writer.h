@@ -0,0 +1,67 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#ifndef TOOLS_GN_JSON_STREAM_WRITER_H_
+#define TOOLS_GN_JSON_STREAM_WRITER_H_
+
+#include <stddef.h>
+
+#include <iosfwd>
+#include <string>
+
+#include "base/macros.h"
+
+namespace base {
+class Value;
+}
+
+// Writes a pretty-printed JSON dictionary to a stream one entry at a time.
+//
+// The output is identical to what base::JSONWriter produces with
+// OPTIONS_PRETTY_PRINT for a base::DictionaryValue holding the same entries.
+// This allows writing large documents (like the description of every target
+// in the build) without first building the whole document in memory.
+//
+// As with base::DictionaryValue, the keys must be written in sorted order.
+// This is checked in debug builds.
+//
+// Nested dictionaries that are themselves too big to build in memory can be
+// streamed by calling BeginDictionary() and writing the entries to a new
+// JSONDictionaryStreamWriter with the returned depth before writing anything
+// else to this one.
+class JSONDictionaryStreamWriter {
+ public:
+  // The depth is the nesting depth of the dictionary: 0 for the top-level
+  // dictionary of a document. The opening brace is written immediately.
+  JSONDictionaryStreamWriter(std::ostream& out, size_t depth);
+  ~JSONDictionaryStreamWriter();
+
+  // Writes the given key and value.
+  void Write(const std::string& key, const base::Value& value);
+
+  // Writes the key of a nested dictionary and returns the depth to use for
+  // the JSONDictionaryStreamWriter that writes it.
+  size_t BeginDictionary(const std::string& key);
+
+  // Writes the closing brace. This must be called exactly once after all
+  // entries have been written. The top-level dictionary is followed by a
+  // line ending.
+  void Close();
+
+ private:
+  void WriteKey(const std::string& key);
+
+  std::ostream& out_;
+  size_t depth_;
+
+  bool has_entries_ = false;
+  bool closed_ = false;
+
+  // Used to check that keys are written in sorted order.
+  std::string last_key_;
+
+  DISALLOW_COPY_AND_ASSIGN(JSONDictionaryStreamWriter);
+};
+
+#endif  // TOOLS_GN_JSON_STREAM_WRITER_H_
@@ -0,0 +1,75 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#include <memory>
+#include <sstream>
+
+#include "base/json/json_writer.h"
+#include "base/values.h"
+#include "test/test.h"
+#include "tools/gn/json_stream_writer.h"
+
+namespace {
+
+std::string WriteWithJSONWriter(const base::Value& value) {
+  std::string result;
+  base::JSONWriter::WriteWithOptions(
+      value, base::JSONWriter::OPTIONS_PRETTY_PRINT, &result);
+  return result;
+}
+
+std::unique_ptr<base::DictionaryValue> MakeNestedValue() {
+  auto inner = std::make_unique<base::DictionaryValue>();
+  inner->SetKey("flag", base::Value(true));
+  inner->SetKey("name", base::Value("has \"quotes\"\nand a newline"));
+
+  auto list = std::make_unique<base::ListValue>();
+  list->AppendString("a");
+  list->AppendString("b");
+  list->Append(std::make_unique<base::DictionaryValue>());
+
+  auto result = std::make_unique<base::DictionaryValue>();
+  result->SetWithoutPathExpansion("inner", std::move(inner));
+  result->SetWithoutPathExpansion("list", std::move(list));
+  result->SetKey("number", base::Value(42));
+  return result;
+}
+
+}  // namespace
+
+TEST(JSONDictionaryStreamWriter, Empty) {
+  std::ostringstream out;
+  JSONDictionaryStreamWriter writer(out, 0);
+  writer.Close();
+
+  EXPECT_EQ(WriteWithJSONWriter(base::DictionaryValue()), out.str());
+}
+
+// The streamed output should match what JSONWriter produces for the same
+// document built in memory.
+TEST(JSONDictionaryStreamWriter, MatchesJSONWriter) {
+  base::DictionaryValue expected;
+  expected.SetWithoutPathExpansion("a.first", MakeNestedValue());
+  expected.SetKey("b", base::Value("string"));
+  auto streamed_dict = std::make_unique<base::DictionaryValue>();
+  streamed_dict->SetWithoutPathExpansion("x", MakeNestedValue());
+  streamed_dict->SetWithoutPathExpansion("y", MakeNestedValue());
+  expected.SetWithoutPathExpansion("c", std::move(streamed_dict));
+  expected.SetWithoutPathExpansion("d", std::make_unique<base::ListValue>());
+
+  std::ostringstream out;
+  JSONDictionaryStreamWriter writer(out, 0);
+  writer.Write("a.first", *MakeNestedValue());
+  writer.Write("b", base::Value("string"));
+  {
+    JSONDictionaryStreamWriter nested(out, writer.BeginDictionary("c"));
+    nested.Write("x", *MakeNestedValue());
+    nested.Write("y", *MakeNestedValue());
+    nested.Close();
+  }
+  writer.Write("d", base::ListValue());
+  writer.Close();
+
+  EXPECT_EQ(WriteWithJSONWriter(expected), out.str());
+}
@@ -0,0 +1,134 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#include "tools/gn/label_pattern_set.h"
+
+#include <utility>
+
+#include "tools/gn/label.h"
+
+namespace {
+
+const size_t kNoMatch = static_cast<size_t>(-1);
+
+// Lists with fewer patterns than this are scanned linearly.
+const size_t kMinIndexedPatterns = 8;
+
+}  // namespace
+
+LabelPatternSet::LabelPatternSet() = default;
+
+LabelPatternSet::LabelPatternSet(std::vector<LabelPattern> patterns)
+    : patterns_(std::move(patterns)) {
+  BuildIndex();
+}
+
+LabelPatternSet::~LabelPatternSet() = default;
+
+void LabelPatternSet::Assign(std::vector<LabelPattern> patterns) {
+  patterns_ = std::move(patterns);
+  BuildIndex();
+}
+
+void LabelPatternSet::Clear() {
+  patterns_.clear();
+  BuildIndex();
+}
+
+bool LabelPatternSet::Matches(const Label& label) const {
+  if (!index_) {
+    for (const LabelPattern& pattern : patterns_) {
+      if (pattern.Matches(label))
+        return true;
+    }
+    return false;
+  }
+
+  bool found = false;
+  ForEachCandidateList(
+      label, [this, &label, &found](const std::vector<size_t>& candidates) {
+        for (size_t index : candidates) {
+          if (patterns_[index].Matches(label)) {
+            found = true;
+            break;
+          }
+        }
+        return found;
+      });
+  return found;
+}
+
+const LabelPattern* LabelPatternSet::FindFirstMatch(const Label& label) const {
+  if (!index_) {
+    for (const LabelPattern& pattern : patterns_) {
+      if (pattern.Matches(label))
+        return &pattern;
+    }
+    return nullptr;
+  }
+
+  size_t best = kNoMatch;
+  ForEachCandidateList(
+      label, [this, &label, &best](const std::vector<size_t>& candidates) {
+        // Candidates are in increasing order so the first match in this list is
+        // the only one that could beat the current best.
+        for (size_t index : candidates) {
+          if (index >= best)
+            break;
+          if (patterns_[index].Matches(label)) {
+            best = index;
+            break;
+          }
+        }
+        // Nothing can come before the first pattern.
+        return best == 0;
+      });
+  return best == kNoMatch ? nullptr : &patterns_[best];
+}
+
+void LabelPatternSet::BuildIndex() {
+  if (patterns_.size() < kMinIndexedPatterns) {
+    index_.reset();
+    return;
+  }
+
+  index_ = std::make_unique<Index>();
+  for (size_t i = 0; i < patterns_.size(); i++) {
+    base::StringPiece dir(patterns_[i].dir().value());
+    if (patterns_[i].type() == LabelPattern::RECURSIVE_DIRECTORY)
+      index_->by_recursive_dir[dir].push_back(i);
+    else
+      index_->by_dir[dir].push_back(i);
+  }
+}
+
+template <typename CheckFunction>
+void LabelPatternSet::ForEachCandidateList(const Label& label,
+                                           CheckFunction check) const {
+  const std::string& dir = label.dir().value();
+
+  if (!index_->by_dir.empty()) {
+    auto found = index_->by_dir.find(dir);
+    if (found != index_->by_dir.end() && check(found->second))
+      return;
+  }
+
+  if (!index_->by_recursive_dir.empty()) {
+    // Directories always end in a slash (except the empty one which matches
+    // everything), so the recursive patterns that can match are the ones
+    // whose directory is empty or ends at one of the slashes in the label's
+    // directory.
+    auto found = index_->by_recursive_dir.find(base::StringPiece());
+    if (found != index_->by_recursive_dir.end() && check(found->second))
+      return;
+    for (size_t i = 0; i < dir.size(); i++) {
+      if (dir[i] != '/')
+        continue;
+      found =
+          index_->by_recursive_dir.find(base::StringPiece(dir.data(), i + 1));
+      if (found != index_->by_recursive_dir.end() && check(found->second))
+        return;
+    }
+  }
+}
@@ -0,0 +1,83 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#ifndef TOOLS_GN_LABEL_PATTERN_SET_H_
+#define TOOLS_GN_LABEL_PATTERN_SET_H_
+
+#include <stddef.h>
+
+#include <memory>
+#include <unordered_map>
+#include <vector>
+
+#include "base/macros.h"
+#include "base/strings/string_piece.h"
+#include "tools/gn/label_pattern.h"
+
+class Label;
+
+// A list of label patterns indexed by directory so that checking whether a
+// label matches any of them doesn't require walking the whole list.
+//
+// Exact and single-directory patterns are looked up by the directory of the
+// label. Recursive patterns are looked up by each directory prefix of the
+// label, so a query costs O(depth of the label's directory) hash lookups
+// instead of O(number of patterns).
+//
+// Most lists (like the default "*" visibility) have only one or two patterns.
+// Those are just scanned and no index is built.
+class LabelPatternSet {
+ public:
+  LabelPatternSet();
+  explicit LabelPatternSet(std::vector<LabelPattern> patterns);
+  ~LabelPatternSet();
+
+  // Replaces the contents of this set with the given patterns.
+  void Assign(std::vector<LabelPattern> patterns);
+
+  void Clear();
+
+  bool empty() const { return patterns_.empty(); }
+
+  // The patterns in the order they were given.
+  const std::vector<LabelPattern>& patterns() const { return patterns_; }
+
+  // Returns true if any pattern in the set matches the label.
+  bool Matches(const Label& label) const;
+
+  // Returns the first pattern (in the order the patterns were given) that
+  // matches the label, or null if there are none.
+  const LabelPattern* FindFirstMatch(const Label& label) const;
+
+ private:
+  // Indices into patterns_. The keys point into the directory strings owned
+  // by patterns_, so the index must be rebuilt whenever patterns_ changes.
+  using PatternIndex = std::unordered_map<base::StringPiece,
+                                          std::vector<size_t>,
+                                          base::StringPieceHash>;
+
+  struct Index {
+    // MATCH and DIRECTORY patterns keyed by the exact directory.
+    PatternIndex by_dir;
+
+    // RECURSIVE_DIRECTORY patterns keyed by the directory prefix.
+    PatternIndex by_recursive_dir;
+  };
+
+  void BuildIndex();
+
+  // Calls |check| with the list of candidate patterns for each directory the
+  // label may be matched by, until it returns true.
+  template <typename CheckFunction>
+  void ForEachCandidateList(const Label& label, CheckFunction check) const;
+
+  std::vector<LabelPattern> patterns_;
+
+  // Only set when there are enough patterns for it to pay off.
+  std::unique_ptr<Index> index_;
+
+  DISALLOW_COPY_AND_ASSIGN(LabelPatternSet);
+};
+
+#endif  // TOOLS_GN_LABEL_PATTERN_SET_H_
@@ -0,0 +1,115 @@
+// Copyright 2018 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+#include "tools/gn/label_pattern_set.h"
+#include "test/test.h"
+#include "tools/gn/err.h"
+#include "tools/gn/label.h"
+#include "tools/gn/value.h"
+
+namespace {
+
+LabelPattern MakePattern(const char* str) {
+  Err err;
+  LabelPattern result =
+      LabelPattern::GetPattern(SourceDir("//"), Value(nullptr, str), &err);
+  EXPECT_FALSE(err.has_error());
+  return result;
+}
+
+}  // namespace
+
+TEST(LabelPatternSet, Matches) {
+  std::vector<LabelPattern> patterns;
+  patterns.push_back(MakePattern("//rec/*"));
+  patterns.push_back(MakePattern("//dir:*"));
+  patterns.push_back(MakePattern("//my:name"));
+  patterns.push_back(MakePattern("//tc:*(//toolchain:other)"));
+  LabelPatternSet set(std::move(patterns));
+
+  SourceDir tc_dir("//toolchain/");
+
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//random/"), "thing")));
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//my/"), "notname")));
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//"), "")));
+
+  EXPECT_TRUE(set.Matches(Label(SourceDir("//my/"), "name")));
+  EXPECT_TRUE(set.Matches(Label(SourceDir("//rec/"), "anything")));
+  EXPECT_TRUE(set.Matches(Label(SourceDir("//rec/a/b/"), "anything")));
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//record/"), "anything")));
+  EXPECT_TRUE(set.Matches(Label(SourceDir("//dir/"), "anything")));
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//dir/a/"), "anything")));
+
+  // Toolchains must still match exactly.
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//tc/"), "a", tc_dir, "default")));
+  EXPECT_TRUE(set.Matches(Label(SourceDir("//tc/"), "a", tc_dir, "other")));
+}
+
+TEST(LabelPatternSet, FindFirstMatch) {
+  std::vector<LabelPattern> patterns;
+  patterns.push_back(MakePattern("//foo/bar:baz"));
+  patterns.push_back(MakePattern("//foo/*"));
+  patterns.push_back(MakePattern("//foo/bar:*"));
+  patterns.push_back(MakePattern("*"));
+  LabelPatternSet set(std::move(patterns));
+
+  // The earliest pattern in the list should be reported when several match.
+  const LabelPattern* match =
+      set.FindFirstMatch(Label(SourceDir("//foo/bar/"), "baz"));
+  ASSERT_TRUE(match);
+  EXPECT_EQ("//foo/bar:baz", match->Describe());
+
+  match = set.FindFirstMatch(Label(SourceDir("//foo/bar/"), "other"));
+  ASSERT_TRUE(match);
+  EXPECT_EQ("//foo/*", match->Describe());
+
+  match = set.FindFirstMatch(Label(SourceDir("//elsewhere/"), "other"));
+  ASSERT_TRUE(match);
+  EXPECT_EQ("*", match->Describe());
+
+  set.Clear();
+  EXPECT_TRUE(set.empty());
+  EXPECT_FALSE(set.FindFirstMatch(Label(SourceDir("//foo/"), "baz")));
+}
+
+// Enough patterns that the set is indexed by directory. The results should be
+// the same as scanning the list.
+TEST(LabelPatternSet, Indexed) {
+  const char* kPatterns[] = {
+      "//a:one", "//b/*", "//a/*", "//c:*",     "//d:two",
+      "//e/f/*", "//g:*", "*",     "//h:three", "//i/*",
+  };
+  std::vector<LabelPattern> patterns;
+  for (const char* pattern : kPatterns)
+    patterns.push_back(MakePattern(pattern));
+  LabelPatternSet set(patterns);
+
+  const Label kLabels[] = {
+      Label(SourceDir("//a/"), "one"),     Label(SourceDir("//a/"), "two"),
+      Label(SourceDir("//b/x/y/"), "z"),   Label(SourceDir("//c/"), "c"),
+      Label(SourceDir("//e/f/g/"), "h"),   Label(SourceDir("//h/"), "three"),
+      Label(SourceDir("//nowhere/"), "x"),
+  };
+  for (const Label& label : kLabels) {
+    const LabelPattern* expected = nullptr;
+    for (const LabelPattern& pattern : patterns) {
+      if (pattern.Matches(label)) {
+        expected = &pattern;
+        break;
+      }
+    }
+    const LabelPattern* match = set.FindFirstMatch(label);
+    ASSERT_TRUE(match);
+    EXPECT_EQ(expected->Describe(), match->Describe());
+    EXPECT_TRUE(set.Matches(label));
+  }
+
+  // Without the "*" pattern only the directories in the list match.
+  patterns.erase(patterns.begin() + 7);
+  set.Assign(patterns);
+  EXPECT_FALSE(set.Matches(Label(SourceDir("//nowhere/"), "x")));
+  EXPECT_FALSE(set.FindFirstMatch(Label(SourceDir("//c/d/"), "x")));
+  EXPECT_EQ("//b/*",
+            set.FindFirstMatch(Label(SourceDir("//b/"), "x"))->Describe());
+}
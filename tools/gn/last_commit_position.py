@@ -16,6 +16,11 @@ Usage: last_commit_position.py <dir> <outfile> <headerguard>
 
   <headerguard>
     String to use as the header guard for the written file.
+
+The commit the repo's HEAD points to is saved next to <outfile> in
+<outfile>.stamp along with the value found for it, so git isn't run again
+until HEAD moves. <outfile> is only written when its contents change, so
+that nothing including it is rebuilt needlessly.
 """
 
 import os
@@ -50,6 +55,100 @@ def RunGitCommand(directory, command):
     return None
 
 
+def FindGitDirs(directory):
+  """
+  Finds the git directory of the repo containing |directory| without running
+  git.
+
+  Returns:
+    A (git_dir, common_dir) tuple, or None. The common directory holds the
+    refs and differs from the git directory in linked worktrees.
+  """
+  directory = os.path.abspath(directory)
+  while True:
+    dot_git = os.path.join(directory, '.git')
+    if os.path.isdir(dot_git):
+      git_dir = dot_git
+      break
+    if os.path.isfile(dot_git):
+      # Worktrees and submodules have a file pointing to the git directory.
+      with open(dot_git) as f:
+        contents = f.read().strip()
+      if not contents.startswith('gitdir: '):
+        return None
+      git_dir = os.path.join(directory, contents[len('gitdir: '):])
+      break
+    parent = os.path.dirname(directory)
+    if parent == directory:
+      return None
+    directory = parent
+
+  common_dir = git_dir
+  commondir_file = os.path.join(git_dir, 'commondir')
+  if os.path.isfile(commondir_file):
+    with open(commondir_file) as f:
+      common_dir = os.path.join(git_dir, f.read().strip())
+  return git_dir, common_dir
+
+
+def ResolveHead(directory):
+  """
+  Reads the hash of the commit HEAD points to from the ref files, which is
+  much cheaper than running git.
+
+  Returns:
+    The commit hash or None if it couldn't be determined.
+  """
+  git_dirs = FindGitDirs(directory)
+  if not git_dirs:
+    return None
+  git_dir, common_dir = git_dirs
+  try:
+    with open(os.path.join(git_dir, 'HEAD')) as f:
+      head = f.read().strip()
+    if not head.startswith('ref: '):
+      # Detached HEAD.
+      return head
+    ref = head[len('ref: '):]
+
+    # Loose refs take precedence over packed ones.
+    for ref_dir in (git_dir, common_dir):
+      ref_file = os.path.join(ref_dir, ref)
+      if os.path.isfile(ref_file):
+        with open(ref_file) as f:
+          return f.read().strip()
+
+    # Each line of packed-refs is "<hash> <ref>", possibly followed by
+    # "^<hash>" lines for annotated tags.
+    with open(os.path.join(common_dir, 'packed-refs')) as f:
+      for line in f:
+        parts = line.split()
+        if len(parts) == 2 and parts[1] == ref:
+          return parts[0]
+  except IOError:
+    pass
+  return None
+
+
+def ReadStamp(stamp_file):
+  """
+  Returns the (head, value) pair saved by WriteStamp or None.
+  """
+  try:
+    with open(stamp_file) as f:
+      lines = f.read().splitlines()
+  except IOError:
+    return None
+  if len(lines) != 2:
+    return None
+  return lines[0], lines[1]
+
+
+def WriteStamp(stamp_file, head, value):
+  with open(stamp_file, 'w') as f:
+    f.write('%s\n%s\n' % (head, value))
+
+
 def FetchCommitPosition(directory):
   regex = re.compile(r'\s*Cr-Commit-Position: refs/heads/master@\{#(\d+)\}\s*')
 
@@ -60,21 +159,30 @@ def FetchCommitPosition(directory):
   max_lines = 2048
 
   proc = RunGitCommand(directory, ['log'])
-  for i in range(max_lines):
-    line = proc.stdout.readline()
-    if not line:
-      return None
-
-    match = regex.match(line)
-    if match:
-      return match.group(1)
+  if not proc:
+    return None
+  try:
+    for i in range(max_lines):
+      line = proc.stdout.readline()
+      if not line:
+        return None
+
+      match = regex.match(line)
+      if match:
+        return match.group(1)
+  finally:
+    # Don't wait for git to print the rest of the history.
+    proc.stdout.close()
+    proc.wait()
 
   return None
 
 
 def WriteHeader(header_file, header_guard, value):
-  with open(header_file, 'w') as f:
-    f.write('''/* Generated by last_commit_position.py. */
+  """
+  Writes the header, unless it already has the same contents.
+  """
+  contents = '''/* Generated by last_commit_position.py. */
 
 #ifndef %(guard)s
 #define %(guard)s
@@ -82,7 +190,16 @@ def WriteHeader(header_file, header_guard, value):
 #define LAST_COMMIT_POSITION "%(value)s"
 
 #endif
-''' % {'guard': header_guard, 'value': value})
+''' % {'guard': header_guard, 'value': value}
+
+  try:
+    with open(header_file) as f:
+      if f.read() == contents:
+        return
+  except IOError:
+    pass
+  with open(header_file, 'w') as f:
+    f.write(contents)
 
 
 if len(sys.argv) != 4:
@@ -93,8 +210,17 @@ git_directory = sys.argv[1]
 output_file = sys.argv[2]
 header_guard = sys.argv[3]
 
-value = FetchCommitPosition(git_directory)
-if not value:
-  value = 'UNKNOWN'
+stamp_file = output_file + '.stamp'
+
+head = ResolveHead(git_directory)
+stamp = ReadStamp(stamp_file)
+if head and stamp and stamp[0] == head:
+  value = stamp[1]
+else:
+  value = FetchCommitPosition(git_directory)
+  if not value:
+    value = 'UNKNOWN'
+  if head:
+    WriteStamp(stamp_file, head, value)
 
 WriteHeader(output_file, header_guard, value)
@@ -350,11 +350,21 @@ Value ExecuteEquals(Scope* exec_scope,
   // Optionally apply the assignment filter in-place.
   const PatternList* filter = dest->GetAssignmentFilter(exec_scope);
   if (filter) {
-    std::vector<Value>& list_value = written_value->list_value();
-    auto first_deleted = std::remove_if(
-        list_value.begin(), list_value.end(),
-        [filter](const Value& v) { return filter->MatchesValue(v); });
-    list_value.erase(first_deleted, list_value.end());
+    // The list is usually shared with the value it was copied from (as in
+    // "sources = invoker.sources"). Look for something to remove through the
+    // const accessor first so the list is only copied when it changes.
+    auto matches = [filter](const Value& v) { return filter->MatchesValue(v); };
+    const std::vector<Value>& const_list =
+        static_cast<const Value*>(written_value)->list_value();
+    auto first_match =
+        std::find_if(const_list.begin(), const_list.end(), matches);
+    if (first_match != const_list.end()) {
+      size_t first_index = first_match - const_list.begin();
+      std::vector<Value>& list_value = written_value->list_value();
+      auto first_deleted = std::remove_if(list_value.begin() + first_index,
+                                          list_value.end(), matches);
+      list_value.erase(first_deleted, list_value.end());
+    }
   }
   return Value();
 }
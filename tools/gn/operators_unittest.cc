@@ -144,6 +144,50 @@ TEST(Operators, SourcesAppend) {
   EXPECT_TRUE(IsValueStringEqualing(value->list_value()[2], "good"));
 }
 
+// Assigning a list with a sources assignment filter shouldn't copy the list
+// unless the filter removes something from it.
+TEST(Operators, SourcesAssignmentFilterSharesList) {
+  Err err;
+  TestWithScope setup;
+
+  std::unique_ptr<PatternList> pattern_list = std::make_unique<PatternList>();
+  pattern_list->Append(Pattern("*rm"));
+  setup.scope()->set_sources_assignment_filter(std::move(pattern_list));
+
+  const char sources[] = "sources";
+  TestBinaryOpNode node(Token::EQUAL, "=");
+  node.SetLeftToIdentifier(sources);
+
+  Value right(nullptr, Value::LIST);
+  right.list_value().push_back(Value(nullptr, "a.cc"));
+  right.list_value().push_back(Value(nullptr, "b.cc"));
+  node.SetRightToValue(right);
+  node.Execute(setup.scope(), &err);
+  EXPECT_FALSE(err.has_error());
+
+  const Value* value = setup.scope()->GetValue(sources);
+  ASSERT_TRUE(value);
+  EXPECT_TRUE(ValuesShareStorage(*value, right));
+  EXPECT_EQ(right, *value);
+
+  // Now something gets filtered out.
+  setup.scope()->SetValue(sources, Value(nullptr, Value::LIST), nullptr);
+  right.list_value().push_back(Value(nullptr, "c-rm"));
+  right.list_value().push_back(Value(nullptr, "d.cc"));
+  node.SetRightToValue(right);
+  node.Execute(setup.scope(), &err);
+  EXPECT_FALSE(err.has_error());
+
+  value = setup.scope()->GetValue(sources);
+  ASSERT_TRUE(value);
+  EXPECT_FALSE(ValuesShareStorage(*value, right));
+  ASSERT_EQ(3u, value->list_value().size());
+  EXPECT_TRUE(IsValueStringEqualing(value->list_value()[0], "a.cc"));
+  EXPECT_TRUE(IsValueStringEqualing(value->list_value()[1], "b.cc"));
+  EXPECT_TRUE(IsValueStringEqualing(value->list_value()[2], "d.cc"));
+  EXPECT_EQ(4u, right.list_value().size());
+}
+
 // Note that the SourcesAppend test above tests the basic list + list features,
 // this test handles the other cases.
 TEST(Operators, ListAppend) {
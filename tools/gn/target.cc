@@ -14,6 +14,7 @@
 #include "tools/gn/deps_iterator.h"
 #include "tools/gn/filesystem_utils.h"
 #include "tools/gn/functions.h"
+#include "tools/gn/label_pattern_set.h"
 #include "tools/gn/scheduler.h"
 #include "tools/gn/source_file_type.h"
 #include "tools/gn/substitution_writer.h"
@@ -156,7 +157,7 @@ bool EnsureFileIsGeneratedByDependency(const Target* target,
 // will be unchanged in this case.
 bool RecursiveCheckAssertNoDeps(const Target* target,
                                 bool check_this,
-                                const std::vector<LabelPattern>& assert_no,
+                                const LabelPatternSet& assert_no,
                                 std::set<const Target*>* visited,
                                 std::string* failure_path_str,
                                 const LabelPattern** failure_pattern) {
@@ -168,14 +169,13 @@ bool RecursiveCheckAssertNoDeps(const Target* target,
 
   if (check_this) {
     // Check this target against the given list of patterns.
-    for (const LabelPattern& pattern : assert_no) {
-      if (pattern.Matches(target->label())) {
-        // Found a match.
-        *failure_pattern = &pattern;
-        *failure_path_str =
-            kIndentPath + target->label().GetUserVisibleName(false);
-        return false;
-      }
+    const LabelPattern* pattern = assert_no.FindFirstMatch(target->label());
+    if (pattern) {
+      // Found a match.
+      *failure_pattern = pattern;
+      *failure_path_str =
+          kIndentPath + target->label().GetUserVisibleName(false);
+      return false;
     }
   }
 
@@ -813,11 +813,12 @@ bool Target::CheckAssertNoDeps(Err* err) const {
   if (assert_no_deps_.empty())
     return true;
 
+  LabelPatternSet assert_no(assert_no_deps_);
   std::set<const Target*> visited;
   std::string failure_path_str;
   const LabelPattern* failure_pattern = nullptr;
 
-  if (!RecursiveCheckAssertNoDeps(this, false, assert_no_deps_, &visited,
+  if (!RecursiveCheckAssertNoDeps(this, false, assert_no, &visited,
                                   &failure_path_str, &failure_pattern)) {
     *err = Err(
         defined_from(), "assert_no_deps failed.",
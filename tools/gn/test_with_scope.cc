@@ -226,3 +226,13 @@ TestTarget::TestTarget(const TestWithScope& setup,
 }
 
 TestTarget::~TestTarget() = default;
+
+bool ValuesShareStorage(const Value& a, const Value& b) {
+  if (a.type_ != b.type_)
+    return false;
+  if (a.type_ == Value::LIST)
+    return a.list_value_ && a.list_value_ == b.list_value_;
+  if (a.type_ == Value::SCOPE)
+    return a.scope_value_ && a.scope_value_ == b.scope_value_;
+  return false;
+}
@@ -117,4 +117,8 @@ class TestTarget : public Target {
   ~TestTarget() override;
 };
 
+// Returns true if the two values currently share the same list or scope
+// storage, which means copying one into the other didn't duplicate it.
+bool ValuesShareStorage(const Value& a, const Value& b);
+
 #endif  // TOOLS_GN_TEST_WITH_SCOPE_H_
@@ -48,8 +48,9 @@ Value::Value(const ParseNode* origin, std::unique_ptr<Scope> scope)
       string_value_(),
       boolean_value_(false),
       int_value_(0),
-      scope_value_(std::move(scope)),
-      origin_(origin) {}
+      origin_(origin) {
+  SetScopeValue(std::move(scope));
+}
 
 Value::Value(const Value& other)
     : type_(other.type_),
@@ -58,8 +59,8 @@ Value::Value(const Value& other)
       int_value_(other.int_value_),
       list_value_(other.list_value_),
       origin_(other.origin_) {
-  if (type() == SCOPE && other.scope_value_.get())
-    scope_value_ = other.scope_value_->MakeClosure();
+  if (type() == SCOPE)
+    CopyScopeFrom(other);
 }
 
 Value::Value(Value&& other) noexcept = default;
@@ -72,8 +73,8 @@ Value& Value::operator=(const Value& other) {
   boolean_value_ = other.boolean_value_;
   int_value_ = other.int_value_;
   list_value_ = other.list_value_;
-  if (type() == SCOPE && other.scope_value_.get())
-    scope_value_ = other.scope_value_->MakeClosure();
+  if (type() == SCOPE)
+    CopyScopeFrom(other);
   origin_ = other.origin_;
   return *this;
 }
@@ -101,7 +102,42 @@ const char* Value::DescribeType(Type t) {
 
 void Value::SetScopeValue(std::unique_ptr<Scope> scope) {
   DCHECK(type_ == SCOPE);
-  scope_value_ = std::move(scope);
+  if (scope)
+    scope_value_ = base::MakeRefCounted<ScopeStorage>(std::move(scope));
+  else
+    scope_value_ = nullptr;
+}
+
+void Value::DetachList() {
+  if (list_value_)
+    list_value_ = base::MakeRefCounted<ListStorage>(list_value_->data);
+  else
+    list_value_ = base::MakeRefCounted<ListStorage>();
+}
+
+void Value::DetachScope() {
+  scope_value_ =
+      base::MakeRefCounted<ScopeStorage>(scope_value_->data->MakeClosure());
+}
+
+void Value::CopyScopeFrom(const Value& other) {
+  if (!other.scope_value_) {
+    scope_value_ = nullptr;
+  } else if (other.scope_value_->data->mutable_containing()) {
+    // A scope with a mutable containing scope (like "invoker") sees values
+    // that may change or go away, so it must be flattened into a closure now
+    // rather than shared.
+    scope_value_ = base::MakeRefCounted<ScopeStorage>(
+        other.scope_value_->data->MakeClosure());
+  } else {
+    scope_value_ = other.scope_value_;
+  }
+}
+
+// static
+const std::vector<Value>& Value::EmptyList() {
+  static const std::vector<Value> empty_list;
+  return empty_list;
 }
 
 std::string Value::ToString(bool quote_string) const {
@@ -139,17 +175,18 @@ std::string Value::ToString(bool quote_string) const {
       return string_value_;
     case LIST: {
       std::string result = "[";
-      for (size_t i = 0; i < list_value_.size(); i++) {
+      const std::vector<Value>& list = list_value();
+      for (size_t i = 0; i < list.size(); i++) {
         if (i > 0)
           result += ", ";
-        result += list_value_[i].ToString(true);
+        result += list[i].ToString(true);
       }
       result.push_back(']');
       return result;
     }
     case SCOPE: {
       Scope::KeyValueMap scope_values;
-      scope_value_->GetCurrentScopeValues(&scope_values);
+      scope_value()->GetCurrentScopeValues(&scope_values);
       if (scope_values.empty())
         return std::string("{ }");
 
@@ -188,6 +225,10 @@ bool Value::operator==(const Value& other) const {
     case Value::STRING:
       return string_value() == other.string_value();
     case Value::LIST:
+      // Copies share storage until one of them is modified, so this is a
+      // cheap way to detect equal lists.
+      if (list_value_ == other.list_value_)
+        return true;
       if (list_value().size() != other.list_value().size())
         return false;
       for (size_t i = 0; i < list_value().size(); i++) {
@@ -12,12 +12,24 @@
 
 #include "base/logging.h"
 #include "base/macros.h"
+#include "base/memory/ref_counted.h"
 #include "tools/gn/err.h"
 
 class ParseNode;
 class Scope;
 
 // Represents a variable value in the interpreter.
+//
+// List and scope values are stored copy-on-write: copying a Value shares the
+// underlying storage, and the storage is only duplicated when a mutable
+// accessor is called on a Value that is sharing it. This makes passing large
+// lists (like sources and deps) through templates and closures cheap. The
+// reference count is thread-safe since values from the build config and
+// template closures are copied from multiple threads.
+//
+// Because of this, a mutable reference returned by list_value() or
+// scope_value() must not be held across a copy of the same Value: the copy
+// would see any later writes through that reference.
 class Value {
  public:
   enum Type {
@@ -87,20 +99,26 @@ class Value {
 
   std::vector<Value>& list_value() {
     DCHECK(type_ == LIST);
-    return list_value_;
+    if (!list_value_ || !list_value_->HasOneRef())
+      DetachList();
+    return list_value_->data;
   }
   const std::vector<Value>& list_value() const {
     DCHECK(type_ == LIST);
-    return list_value_;
+    return list_value_ ? list_value_->data : EmptyList();
   }
 
   Scope* scope_value() {
     DCHECK(type_ == SCOPE);
-    return scope_value_.get();
+    if (!scope_value_)
+      return nullptr;
+    if (!scope_value_->HasOneRef())
+      DetachScope();
+    return scope_value_->data.get();
   }
   const Scope* scope_value() const {
     DCHECK(type_ == SCOPE);
-    return scope_value_.get();
+    return scope_value_ ? scope_value_->data.get() : nullptr;
   }
   void SetScopeValue(std::unique_ptr<Scope> scope);
 
@@ -118,6 +136,23 @@ class Value {
   bool operator!=(const Value& other) const;
 
  private:
+  // Checks copy-on-write sharing in tests, see test_with_scope.h.
+  friend bool ValuesShareStorage(const Value& a, const Value& b);
+
+  using ListStorage = base::RefCountedData<std::vector<Value>>;
+  using ScopeStorage = base::RefCountedData<std::unique_ptr<Scope>>;
+
+  // Gives this value its own copy of the list or scope storage so it can be
+  // modified without affecting other values sharing it.
+  void DetachList();
+  void DetachScope();
+
+  // Copies the scope storage from the other value. This shares the storage
+  // when possible.
+  void CopyScopeFrom(const Value& other);
+
+  static const std::vector<Value>& EmptyList();
+
   // This are a lot of objects associated with every Value that need
   // initialization and tear down every time. It might be more efficient to
   // create a union of objects (see small_map) and only use the one we care
@@ -126,8 +161,9 @@ class Value {
   std::string string_value_;
   bool boolean_value_;
   int64_t int_value_;
-  std::vector<Value> list_value_;
-  std::unique_ptr<Scope> scope_value_;
+  // Either may be null for an empty list or a null scope.
+  scoped_refptr<ListStorage> list_value_;
+  scoped_refptr<ScopeStorage> scope_value_;
 
   const ParseNode* origin_;
 };
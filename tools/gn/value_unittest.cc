@@ -41,3 +41,61 @@ TEST(Value, ToString) {
   scope->SetValue("b", Value(nullptr, "hello, world"), nullptr);
   EXPECT_EQ("{\n  a = 42\n  b = \"hello, world\"\n}", scopeval.ToString(false));
 }
+
+TEST(Value, CopyOnWriteList) {
+  Value original(nullptr, Value::LIST);
+  original.list_value().push_back(Value(nullptr, "a"));
+  original.list_value().push_back(Value(nullptr, "b"));
+
+  // Copies share the list until one of them is modified.
+  Value copy(original);
+  EXPECT_TRUE(ValuesShareStorage(copy, original));
+  EXPECT_TRUE(copy == original);
+
+  copy.list_value().push_back(Value(nullptr, "c"));
+  EXPECT_FALSE(ValuesShareStorage(copy, original));
+  ASSERT_EQ(2u, original.list_value().size());
+  ASSERT_EQ(3u, copy.list_value().size());
+  EXPECT_EQ("c", copy.list_value()[2].string_value());
+
+  // Nested lists are shared independently of their parent.
+  Value outer(nullptr, Value::LIST);
+  outer.list_value().push_back(original);
+  Value outer_copy(outer);
+  outer_copy.list_value()[0].list_value().clear();
+  const Value& const_outer = outer;
+  EXPECT_EQ(2u, const_outer.list_value()[0].list_value().size());
+  EXPECT_TRUE(ValuesShareStorage(const_outer.list_value()[0], original));
+
+  // An empty list doesn't need any storage.
+  Value empty(nullptr, Value::LIST);
+  EXPECT_TRUE(empty.list_value().empty());
+  EXPECT_TRUE(empty == Value(nullptr, Value::LIST));
+}
+
+TEST(Value, CopyOnWriteScope) {
+  TestWithScope setup;
+
+  // Detached scopes (like the result of a { } block) are shared by copies.
+  std::unique_ptr<Scope> detached = std::make_unique<Scope>(setup.settings());
+  detached->SetValue("a", Value(nullptr, static_cast<int64_t>(1)), nullptr);
+  Value original(nullptr, std::move(detached));
+
+  Value copy(original);
+  EXPECT_TRUE(ValuesShareStorage(copy, original));
+
+  copy.scope_value()->SetValue("a", Value(nullptr, static_cast<int64_t>(2)),
+                               nullptr);
+  EXPECT_FALSE(ValuesShareStorage(copy, original));
+  const Value& const_original = original;
+  EXPECT_EQ(1, const_original.scope_value()->GetValue("a")->int_value());
+  const Value& const_copy = copy;
+  EXPECT_EQ(2, const_copy.scope_value()->GetValue("a")->int_value());
+
+  // Scopes with a mutable containing scope are flattened when copied.
+  Value nested(nullptr, std::make_unique<Scope>(setup.scope()));
+  Value nested_copy(nested);
+  EXPECT_FALSE(ValuesShareStorage(nested_copy, nested));
+  const Value& const_nested_copy = nested_copy;
+  EXPECT_FALSE(const_nested_copy.scope_value()->mutable_containing());
+}
@@ -5,6 +5,7 @@
 #include "tools/gn/visibility.h"
 
 #include <memory>
+#include <utility>
 
 #include "base/strings/string_piece.h"
 #include "base/strings/string_util.h"
@@ -24,35 +25,39 @@ Visibility::~Visibility() = default;
 bool Visibility::Set(const SourceDir& current_dir,
                      const Value& value,
                      Err* err) {
-  patterns_.clear();
+  patterns_.Clear();
 
   if (!value.VerifyTypeIs(Value::LIST, err)) {
     CHECK(err->has_error());
     return false;
   }
 
+  std::vector<LabelPattern> patterns;
   for (const auto& item : value.list_value()) {
-    patterns_.push_back(LabelPattern::GetPattern(current_dir, item, err));
+    patterns.push_back(LabelPattern::GetPattern(current_dir, item, err));
     if (err->has_error())
       return false;
   }
+  patterns_.Assign(std::move(patterns));
   return true;
 }
 
 void Visibility::SetPublic() {
-  patterns_.clear();
-  patterns_.push_back(LabelPattern(LabelPattern::RECURSIVE_DIRECTORY,
-                                   SourceDir(), std::string(), Label()));
+  std::vector<LabelPattern> patterns;
+  patterns.push_back(LabelPattern(LabelPattern::RECURSIVE_DIRECTORY,
+                                  SourceDir(), std::string(), Label()));
+  patterns_.Assign(std::move(patterns));
 }
 
 void Visibility::SetPrivate(const SourceDir& current_dir) {
-  patterns_.clear();
-  patterns_.push_back(LabelPattern(LabelPattern::DIRECTORY, current_dir,
-                                   std::string(), Label()));
+  std::vector<LabelPattern> patterns;
+  patterns.push_back(LabelPattern(LabelPattern::DIRECTORY, current_dir,
+                                  std::string(), Label()));
+  patterns_.Assign(std::move(patterns));
 }
 
 bool Visibility::CanSeeMe(const Label& label) const {
-  return LabelPattern::VectorMatches(patterns_, label);
+  return patterns_.Matches(label);
 }
 
 std::string Visibility::Describe(int indent, bool include_brackets) const {
@@ -70,7 +75,7 @@ std::string Visibility::Describe(int indent, bool include_brackets) const {
     inner_indent_string += "  ";
   }
 
-  for (const auto& pattern : patterns_)
+  for (const auto& pattern : patterns_.patterns())
     result += inner_indent_string + pattern.Describe() + "\n";
 
   if (include_brackets)
@@ -80,7 +85,7 @@ std::string Visibility::Describe(int indent, bool include_brackets) const {
 
 std::unique_ptr<base::Value> Visibility::AsValue() const {
   auto res = std::make_unique<base::ListValue>();
-  for (const auto& pattern : patterns_)
+  for (const auto& pattern : patterns_.patterns())
     res->AppendString(pattern.Describe());
   return std::move(res);
 }
@@ -9,7 +9,7 @@
 #include <vector>
 
 #include "base/macros.h"
-#include "tools/gn/label_pattern.h"
+#include "tools/gn/label_pattern_set.h"
 #include "tools/gn/source_dir.h"
 
 namespace base {
@@ -60,7 +60,7 @@ class Visibility {
   static bool FillItemVisibility(Item* item, Scope* scope, Err* err);
 
  private:
-  std::vector<LabelPattern> patterns_;
+  LabelPatternSet patterns_;
 
   DISALLOW_COPY_AND_ASSIGN(Visibility);
 };